@@ -4,7 +4,7 @@ Lighter客户端演示脚本
 展示如何实例化和使用Lighter交易所客户端
 """
 
-import asyncio
+import io
 import logging
 import sys
 import os
@@ -21,12 +21,23 @@ if lighter_python_path not in sys.path:
 
 from src.lighter_client import LighterClient
 from src.config import LighterConfig
+from src._loop import run
 
 
+# 日志与print共用块缓冲的标准输出，退出时统一flush，避免每行一次write系统调用
+_stdout = io.TextIOWrapper(
+    sys.stdout.buffer,
+    encoding=sys.stdout.encoding,
+    write_through=False,
+    line_buffering=False
+)
+sys.stdout = _stdout
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(_stdout)]
 )
 
 
@@ -89,11 +100,11 @@ async def demo_lighter_client():
         
         market_info = await client.get_market_info()
         print(f"✅ 市场信息获取成功:")
-        print(f"   交易对: {market_info['symbol']}")
-        print(f"   价格精度: {market_info['price_precision']} 位小数")
-        print(f"   数量精度: {market_info['quantity_precision']} 位小数")
-        print(f"   最小数量: {market_info['min_quantity']}")
-        print(f"   最小交易额: {market_info['min_notional']}")
+        print(f"   交易对: {market_info.symbol}")
+        print(f"   价格精度: {market_info.price_precision} 位小数")
+        print(f"   数量精度: {market_info.quantity_precision} 位小数")
+        print(f"   最小数量: {market_info.min_quantity}")
+        print(f"   最小交易额: {market_info.min_notional}")
         
         # 4. 获取订单簿
         print("\n" + "=" * 70)
@@ -219,5 +230,8 @@ async def main():
 
 if __name__ == "__main__":
     print("🚀 启动Lighter客户端演示...")
-    asyncio.run(main())
-    print("\n👋 演示结束")
+    try:
+        run(main())
+        print("\n👋 演示结束")
+    finally:
+        _stdout.flush()
@@ -1,7 +1,7 @@
 """
 文件名：basic_usage.py
 用途：Lighter交易所客户端基本使用示例，演示WebSocket优先的数据获取模式
-依赖：asyncio, logging, sys, os, lighter_client
+依赖：asyncio, logging, sys, os, numpy, lighter_client
 核心功能：1. 客户端初始化与配置；2. WebSocket实时数据订阅；3. 数据验证与精度管理；4. 错误处理与资源清理
 注意事项：所有交易所数据优先通过WebSocket获取，仅当WebSocket不可用时回退到REST API
 """
@@ -12,6 +12,8 @@ import sys
 import os
 from typing import Dict, Any, Optional
 
+import numpy as np
+
 # 添加必要的目录到Python路径
 current_dir = os.path.dirname(__file__)
 project_root = os.path.join(current_dir, '..')
@@ -23,6 +25,7 @@ if lighter_python_path not in sys.path:
     sys.path.insert(0, lighter_python_path)  # lighter-python 目录
 
 from src.lighter_client import LighterClient
+from src._loop import run
 
 
 # 配置日志
@@ -43,43 +46,29 @@ async def order_book_callback(event_type: str, data: Dict[str, Any]):
     try:
         if event_type == 'subscribed':
             channel = data.get('channel', '未知频道')
-            logger.info(f"订单簿订阅成功: {channel}")
-            print(f"✅ 订单簿订阅成功: {channel}")
+            logger.info("订单簿订阅成功: %s", channel)
             
         elif event_type == 'update':
             channel = data.get('channel', '未知频道')
-            update_data = data.get('data', {})
+            book = data.get('book')
             
             # 验证数据完整性
-            if not update_data:
-                logger.warning(f"订单簿更新数据为空: {channel}")
+            if book is None:
+                logger.warning("订单簿更新数据为空: %s", channel)
                 return
             
-            # 提取订单簿数据
-            asks = update_data.get('asks', [])
-            bids = update_data.get('bids', [])
-            
-            # 数据验证
-            if not isinstance(asks, list) or not isinstance(bids, list):
-                logger.error(f"订单簿数据格式错误: asks={type(asks)}, bids={type(bids)}")
+            # 每条更新都会触发回调，DEBUG未开启时跳过档位转换和格式化
+            if not logger.isEnabledFor(logging.DEBUG):
                 return
             
-            logger.debug(f"订单簿更新: {channel}, 卖单数={len(asks)}, 买单数={len(bids)}")
+            logger.debug("订单簿更新: %s, 卖单数=%d, 买单数=%d", channel, book.ask_count, book.bid_count)
             
-            # 显示前3个价格档位
-            if asks:
-                print(f"📉 卖单前3档:")
-                for i, ask in enumerate(asks[:3]):
-                    price = ask.get('price', 0)
-                    quantity = ask.get('quantity', 0)
-                    print(f"    {i+1}. 价格={price}, 数量={quantity}")
-            
-            if bids:
-                print(f"📈 买单前3档:")
-                for i, bid in enumerate(bids[:3]):
-                    price = bid.get('price', 0)
-                    quantity = bid.get('quantity', 0)
-                    print(f"    {i+1}. 价格={price}, 数量={quantity}")
+            # 只取前3档，避免转换整个订单簿
+            top = book.to_dict(depth=3)
+            for i, ask in enumerate(top['asks']):
+                logger.debug("ask %d p=%s q=%s", i + 1, ask['price'], ask['quantity'])
+            for i, bid in enumerate(top['bids']):
+                logger.debug("bid %d p=%s q=%s", i + 1, bid['price'], bid['quantity'])
                     
     except Exception as e:
         logger.error(f"订单簿回调处理失败: {e}")
@@ -97,19 +86,18 @@ async def account_callback(event_type: str, data: Dict[str, Any]):
             channel = data.get('channel', '未知频道')
             initial_data = data.get('data', {})
             
-            logger.info(f"账户订阅成功: {channel}")
-            print(f"✅ 账户订阅成功: {channel}")
+            logger.info("账户订阅成功: %s", channel)
             
             # 显示初始账户信息
             if initial_data and 'assets' in initial_data:
                 assets = initial_data['assets']
                 if isinstance(assets, dict):
-                    print(f"💰 初始账户资产: {len(assets)} 种")
+                    logger.info("初始账户资产: %d 种", len(assets))
                     for symbol, asset_info in list(assets.items())[:5]:  # 显示前5个资产
                         balance = asset_info.get('balance', 0)
                         locked = asset_info.get('locked_balance', 0)
                         total = float(balance) + float(locked)
-                        print(f"    {symbol}: 可用={balance}, 锁定={locked}, 总计={total}")
+                        logger.info("    %s: 可用=%s, 锁定=%s, 总计=%s", symbol, balance, locked, total)
             
         elif event_type == 'update':
             channel = data.get('channel', '未知频道')
@@ -117,21 +105,20 @@ async def account_callback(event_type: str, data: Dict[str, Any]):
             
             # 验证数据完整性
             if not update_data:
-                logger.warning(f"账户更新数据为空: {channel}")
+                logger.warning("账户更新数据为空: %s", channel)
                 return
             
-            logger.debug(f"账户更新: {channel}")
+            logger.debug("账户更新: %s", channel)
             
             # 检查是否有余额变化
-            if 'assets' in update_data:
+            if 'assets' in update_data and logger.isEnabledFor(logging.DEBUG):
                 assets = update_data['assets']
                 if isinstance(assets, dict):
-                    print(f"🔄 账户余额更新:")
                     for symbol, asset_info in assets.items():
                         balance = asset_info.get('balance', 0)
                         locked = asset_info.get('locked_balance', 0)
                         total = float(balance) + float(locked)
-                        print(f"    {symbol}: 可用={balance}, 锁定={locked}, 总计={total}")
+                        logger.debug("账户余额更新 %s: 可用=%s, 锁定=%s, 总计=%s", symbol, balance, locked, total)
                         
     except Exception as e:
         logger.error(f"账户回调处理失败: {e}")
@@ -176,22 +163,22 @@ async def main():
             
             # 数据验证
             required_fields = ['symbol', 'price_precision', 'quantity_precision', 'min_quantity']
-            missing_fields = [field for field in required_fields if field not in market_info]
+            missing_fields = [field for field in required_fields if getattr(market_info, field, None) is None]
             
             if missing_fields:
                 print(f"⚠️  市场信息缺少字段: {missing_fields}")
             else:
                 print(f"✅ 市场信息完整")
-                print(f"   交易对: {market_info['symbol']}")
-                print(f"   价格精度: {market_info['price_precision']}")
-                print(f"   数量精度: {market_info['quantity_precision']}")
-                print(f"   最小数量: {market_info['min_quantity']}")
+                print(f"   交易对: {market_info.symbol}")
+                print(f"   价格精度: {market_info.price_precision}")
+                print(f"   数量精度: {market_info.quantity_precision}")
+                print(f"   最小数量: {market_info.min_quantity}")
                 
                 # 验证精度值合理性
-                if market_info['price_precision'] < 0 or market_info['price_precision'] > 10:
-                    print(f"⚠️  价格精度值异常: {market_info['price_precision']}")
-                if market_info['quantity_precision'] < 0 or market_info['quantity_precision'] > 10:
-                    print(f"⚠️  数量精度值异常: {market_info['quantity_precision']}")
+                if market_info.price_precision < 0 or market_info.price_precision > 10:
+                    print(f"⚠️  价格精度值异常: {market_info.price_precision}")
+                if market_info.quantity_precision < 0 or market_info.quantity_precision > 10:
+                    print(f"⚠️  数量精度值异常: {market_info.quantity_precision}")
                     
         except Exception as e:
             print(f"❌ 获取市场信息失败: {e}")
@@ -222,7 +209,7 @@ async def main():
             # 订阅订单簿
             symbol = client.config.symbol
             print(f"\n4.1 订阅订单簿实时数据: {symbol}")
-            subscribed = await client.subscribe_order_book(symbol, collect_order_book_updates)
+            subscribed = await client.subscribe_order_book(symbol, collect_order_book_updates, top_n=3)
             
             if subscribed:
                 print(f"✅ 订单簿订阅成功")
@@ -244,11 +231,9 @@ async def main():
                     print(f"   账户更新次数: {len(account_updates)}")
                     
                     if order_book_updates:
-                        latest_order_book = order_book_updates[-1]
-                        update_data = latest_order_book.get('data', {})
-                        asks = update_data.get('asks', [])
-                        bids = update_data.get('bids', [])
-                        print(f"   最新订单簿: 卖单={len(asks)}, 买单={len(bids)}")
+                        book = order_book_updates[-1].get('book')
+                        if book is not None:
+                            print(f"   最新订单簿: 卖单={book.ask_count}, 买单={book.bid_count}")
                     
                     if account_updates:
                         latest_account = account_updates[-1]
@@ -283,17 +268,20 @@ async def main():
                     print(f"✅ 获取账户余额成功")
                     print(f"   资产数量: {len(balances)}")
                     
+                    # 一次性提取所有资产的可用/锁定/总计，向量化验证数据一致性
+                    symbols = list(balances)
+                    count = len(symbols)
+                    free = np.fromiter((balances[s].get('free', 0) for s in symbols), dtype=np.float64, count=count)
+                    locked = np.fromiter((balances[s].get('locked', 0) for s in symbols), dtype=np.float64, count=count)
+                    total = np.fromiter((balances[s].get('total', 0) for s in symbols), dtype=np.float64, count=count)
+                    bad = np.abs(total - (free + locked)) > 0.0001
+                    
+                    for i in np.flatnonzero(bad):
+                        print(f"⚠️  资产数据不一致: {symbols[i]}, 总计={total[i]}, 可用+锁定={free[i] + locked[i]}")
+                    
                     # 显示前5个资产
-                    for i, (symbol, balance) in enumerate(list(balances.items())[:5]):
-                        free = balance.get('free', 0)
-                        locked = balance.get('locked', 0)
-                        total = balance.get('total', 0)
-                        
-                        # 验证数据一致性
-                        if abs(total - (free + locked)) > 0.0001:
-                            print(f"⚠️  资产数据不一致: {symbol}, 总计={total}, 可用+锁定={free+locked}")
-                        
-                        print(f"   {i+1}. {symbol}: 可用={free}, 锁定={locked}, 总计={total}")
+                    for i, symbol in enumerate(symbols[:5]):
+                        print(f"   {i+1}. {symbol}: 可用={free[i]}, 锁定={locked[i]}, 总计={total[i]}")
                     
                     if len(balances) > 5:
                         print(f"   ... 还有 {len(balances) - 5} 个资产未显示")
@@ -360,9 +348,9 @@ async def main():
             
             # 获取市场信息用于验证
             market_info = await client.get_market_info()
-            symbol = market_info['symbol']
-            price_precision = market_info['price_precision']
-            quantity_precision = market_info['quantity_precision']
+            symbol = market_info.symbol
+            price_precision = market_info.price_precision
+            quantity_precision = market_info.quantity_precision
             
             print(f"   交易对: {symbol}")
             print(f"   价格精度: {price_precision}")
@@ -404,4 +392,4 @@ async def main():
 
 if __name__ == "__main__":
     # 运行示例
-    asyncio.run(main())
+    run(main())
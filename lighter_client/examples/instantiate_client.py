@@ -6,7 +6,6 @@
 核心功能：1. 默认配置实例化；2. 自定义配置实例化；3. 配置文件实例化
 """
 
-import asyncio
 import logging
 import sys
 import os
@@ -35,6 +34,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from src.lighter_client import LighterClient
 from src.config import LighterConfig
+from src._loop import run
 
 
 # 配置日志
@@ -72,9 +72,9 @@ async def instantiate_client_example():
         # 获取市场信息
         market_info = await client1.get_market_info()
         print(f"✅ 获取市场信息成功:")
-        print(f"   市场ID: {market_info['market_id']}")
-        print(f"   价格精度: {market_info['price_precision']}")
-        print(f"   数量精度: {market_info['quantity_precision']}")
+        print(f"   市场ID: {market_info.market_id}")
+        print(f"   价格精度: {market_info.price_precision}")
+        print(f"   数量精度: {market_info.quantity_precision}")
         
         await client1.close()
         print("✅ 客户端已关闭")
@@ -111,9 +111,9 @@ async def instantiate_client_example():
         # 获取市场信息
         market_info = await client2.get_market_info()
         print(f"✅ 获取市场信息成功:")
-        print(f"   市场ID: {market_info['market_id']}")
-        print(f"   价格精度: {market_info['price_precision']}")
-        print(f"   数量精度: {market_info['quantity_precision']}")
+        print(f"   市场ID: {market_info.market_id}")
+        print(f"   价格精度: {market_info.price_precision}")
+        print(f"   数量精度: {market_info.quantity_precision}")
         
         await client2.close()
         print("✅ 客户端已关闭")
@@ -169,7 +169,7 @@ async def main():
 
 if __name__ == "__main__":
     print("🚀 启动Lighter客户端实例化示例...")
-    asyncio.run(main())
+    run(main())
     print("\n👋 示例结束")
 
 
@@ -5,10 +5,46 @@ Lighter交易所Python客户端包
 自动精度管理和交易功能。
 """
 
-from .config import LighterConfig, get_config, ConfigError
-from .precision_manager import PrecisionManager, PrecisionManagerError
-from .websocket_client import LighterWebSocketClient, WebSocketClientError
-from .lighter_client import LighterClient, LighterClientError
+import importlib
+
+
+# 导出名称 -> 所在子模块，首次访问时才导入（PEP 562），避免导入包时加载numpy/lighter SDK等重依赖
+_LAZY = {
+    "LighterConfig": ".config",
+    "get_config": ".config",
+    "ConfigError": ".config",
+    "PrecisionManager": ".precision_manager",
+    "PrecisionManagerError": ".precision_manager",
+    "LighterWebSocketClient": ".websocket_client",
+    "WebSocketClientError": ".websocket_client",
+    "LocalOrderBook": ".local_order_book",
+    "CLocalOrderBook": ".local_order_book",
+    "create_order_book": ".local_order_book",
+    "LighterClient": ".lighter_client",
+    "LighterClientError": ".lighter_client",
+    "MarketInfo": ".lighter_client",
+    "OrderBatcher": ".batcher",
+    "BatchConfig": ".batcher",
+    "OrderHandle": ".batcher",
+    "OrderBatcherError": ".batcher",
+    "GrpcLighterClient": ".grpc_client",
+    "GrpcClientError": ".grpc_client",
+}
+
+
+def __getattr__(name):
+    """按需导入导出名称，结果写回模块命名空间，后续访问不再经过此函数"""
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
 
 __version__ = "1.0.0"
 __author__ = "Lighter Client Team"
@@ -27,8 +63,22 @@ __all__ = [
     # WebSocket模块
     "LighterWebSocketClient",
     "WebSocketClientError",
+    "LocalOrderBook",
+    "CLocalOrderBook",
+    "create_order_book",
     
     # 主客户端
     "LighterClient",
     "LighterClientError",
+    "MarketInfo",
+    
+    # 批量下单模块
+    "OrderBatcher",
+    "BatchConfig",
+    "OrderHandle",
+    "OrderBatcherError",
+    
+    # gRPC模块
+    "GrpcLighterClient",
+    "GrpcClientError",
 ]
@@ -0,0 +1,25 @@
+"""
+文件名：_build_aot.py
+用途：使用numba.pycc将订单簿合并内核AOT预编译为扩展模块_ob_kernels_aot
+依赖：numba, _ob_kernels
+核心功能：1. 导出merge_side的float64签名；2. 在src目录生成_ob_kernels_aot扩展
+注意事项：在lighter_client目录下执行 python -m src._build_aot；numba.pycc已被numba标记为弃用
+"""
+
+import os
+
+from numba.pycc import CC
+
+from ._ob_kernels import _merge_side_py
+
+
+cc = CC('_ob_kernels_aot')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# 签名：(prices, qtys, upd_prices, upd_qtys, is_ask) -> (prices, qtys)
+cc.export('merge_side', 'Tuple((f8[:], f8[:]))(f8[:], f8[:], f8[:], f8[:], b1)')(_merge_side_py)
+
+
+if __name__ == '__main__':
+    cc.compile()
+    print(f"AOT内核编译完成: {cc.output_dir}")
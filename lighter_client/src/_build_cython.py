@@ -0,0 +1,47 @@
+"""
+文件名：_build_cython.py
+用途：使用Cython将WebSocket分发内核_ws_dispatch.py编译为扩展模块_ws_dispatch_c
+依赖：Cython, setuptools, _ws_dispatch
+核心功能：1. 以_ws_dispatch_c为模块名复制源文件；2. 纯Python模式编译（language_level=3str）；3. 在src目录生成扩展
+注意事项：在lighter_client目录下执行 python -m src._build_cython；未编译时websocket_client自动使用纯Python内核
+"""
+
+import os
+import shutil
+import tempfile
+
+from Cython.Build import cythonize
+from setuptools import Extension
+from setuptools.dist import Distribution
+
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+MODULE_NAME = '_ws_dispatch_c'
+
+
+def build():
+    """
+    功能：编译分发内核扩展
+    入参：无
+    返回值：无
+    核心规则：扩展模块名需与源文件名一致，先复制为_ws_dispatch_c.py再编译，输出到src目录
+    """
+    with tempfile.TemporaryDirectory() as build_dir:
+        source = os.path.join(build_dir, f"{MODULE_NAME}.py")
+        shutil.copyfile(os.path.join(SRC_DIR, '_ws_dispatch.py'), source)
+        
+        extensions = cythonize(
+            [Extension(MODULE_NAME, [source])],
+            compiler_directives={'language_level': '3str'},
+            build_dir=build_dir,
+        )
+        dist = Distribution({'ext_modules': extensions})
+        build_ext = dist.get_command_obj('build_ext')
+        build_ext.build_temp = build_dir
+        build_ext.build_lib = SRC_DIR
+        dist.run_command('build_ext')
+
+
+if __name__ == '__main__':
+    build()
+    print(f"Cython分发内核编译完成: {SRC_DIR}")
@@ -0,0 +1,30 @@
+"""
+文件名：_loop.py
+用途：示例脚本统一入口，优先使用uvloop事件循环运行协程
+依赖：asyncio, uvloop（可选）
+核心功能：1. 已安装uvloop时使用libuv事件循环；2. 未安装（如Windows）时回退到asyncio默认事件循环
+"""
+
+import asyncio
+from typing import Any, Coroutine
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    uvloop = None
+    UVLOOP_AVAILABLE = False
+
+
+def run(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    功能：运行顶层协程
+    入参：coro - 协程对象
+    返回值：协程的返回值
+    核心规则：1. 新版uvloop使用uvloop.run；2. 旧版通过事件循环策略安装；3. 无uvloop时等同asyncio.run
+    """
+    if UVLOOP_AVAILABLE:
+        if hasattr(uvloop, 'run'):
+            return uvloop.run(coro)
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return asyncio.run(coro)
@@ -0,0 +1,112 @@
+"""
+文件名：_ob_kernels.py
+用途：订单簿增量合并内核，基于NumPy并行数组（SoA）并使用Numba JIT编译
+依赖：numpy, numba（可选）, _ob_kernels_aot（可选，由_build_aot.py生成）
+核心功能：1. 单侧订单簿增量合并（插入/更新/删除）；2. JIT预热；3. 优先加载AOT预编译内核
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """未安装numba时的空装饰器，内核以纯Python方式运行"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+try:
+    # AOT预编译扩展（python -m src._build_aot生成），无需运行时编译
+    from . import _ob_kernels_aot
+    AOT_AVAILABLE = True
+except ImportError:
+    _ob_kernels_aot = None
+    AOT_AVAILABLE = False
+
+
+def _merge_side_py(prices, qtys, upd_prices, upd_qtys, is_ask):
+    """
+    功能：将增量档位合并到单侧订单簿
+    入参：prices/qtys - 已排序的档位价格与数量；upd_prices/upd_qtys - 增量档位（无序）；
+          is_ask - 是否为卖单侧（卖单价格升序，买单价格降序）
+    返回值：(prices, qtys) - 合并后的新数组
+    核心规则：1. 数量为0表示删除该价位；2. 同一增量内重复价位以最后一条为准；3. 归并保持排序
+    """
+    n = prices.shape[0]
+    m = upd_prices.shape[0]
+
+    # 稳定排序增量，保证重复价位时后到的更新生效
+    if is_ask:
+        order = np.argsort(upd_prices, kind='mergesort')
+    else:
+        order = np.argsort(-upd_prices, kind='mergesort')
+
+    out_prices = np.empty(n + m, dtype=np.float64)
+    out_qtys = np.empty(n + m, dtype=np.float64)
+
+    i = 0
+    j = 0
+    k = 0
+    while i < n or j < m:
+        if j < m:
+            # 跳到同一价位的最后一条更新
+            idx = order[j]
+            price = upd_prices[idx]
+            while j + 1 < m and upd_prices[order[j + 1]] == price:
+                j += 1
+                idx = order[j]
+
+            if i < n and prices[i] == price:
+                # 更新或删除已有价位
+                if upd_qtys[idx] > 0.0:
+                    out_prices[k] = price
+                    out_qtys[k] = upd_qtys[idx]
+                    k += 1
+                i += 1
+                j += 1
+                continue
+
+            if i >= n or (price < prices[i]) == is_ask:
+                # 插入新价位
+                if upd_qtys[idx] > 0.0:
+                    out_prices[k] = price
+                    out_qtys[k] = upd_qtys[idx]
+                    k += 1
+                j += 1
+                continue
+
+        out_prices[k] = prices[i]
+        out_qtys[k] = qtys[i]
+        k += 1
+        i += 1
+
+    return out_prices[:k].copy(), out_qtys[:k].copy()
+
+
+# 优先使用AOT预编译内核，否则回退到JIT编译
+if AOT_AVAILABLE:
+    merge_side = _ob_kernels_aot.merge_side
+else:
+    merge_side = njit(cache=True, fastmath=True)(_merge_side_py)
+
+
+def warmup():
+    """
+    功能：预热JIT内核，避免首条实时更新承担编译开销
+    入参：无
+    返回值：无
+    核心规则：1. 分别以卖单侧和买单侧调用一次，触发所有类型特化的编译；2. AOT内核无需预热
+    """
+    if AOT_AVAILABLE:
+        return
+    
+    prices = np.array([1.0, 2.0], dtype=np.float64)
+    qtys = np.array([1.0, 1.0], dtype=np.float64)
+    upd_prices = np.array([1.5], dtype=np.float64)
+    upd_qtys = np.array([1.0], dtype=np.float64)
+    merge_side(prices, qtys, upd_prices, upd_qtys, True)
+    merge_side(prices[::-1].copy(), qtys, upd_prices, upd_qtys, False)
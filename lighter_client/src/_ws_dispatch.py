@@ -0,0 +1,35 @@
+"""
+文件名：_ws_dispatch.py
+用途：WebSocket消息分发的同步路由内核，可由_build_cython.py编译为扩展模块_ws_dispatch_c
+依赖：无（JSON解析函数由调用方传入）
+核心功能：1. 解析消息并查找消息处理器；2. 按完整频道字符串查找订阅回调
+注意事项：保持纯Python语法（Cython纯Python模式），未编译时以普通模块运行
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def route_message(message: bytes, handlers: Dict[str, Callable], loads: Callable[[bytes], Any]) -> Tuple[Optional[Callable], Any]:
+    """
+    功能：解析WebSocket消息并查找对应的消息处理器
+    入参：message - 原始消息（UTF-8编码的bytes）；handlers - 消息类型 -> 处理器；loads - JSON解析函数
+    返回值：(handler, data) - 未注册的消息类型handler为None
+    核心规则：JSON解析错误直接抛出，由调用方记录
+    """
+    data = loads(message)
+    return handlers.get(data.get('type')), data
+
+
+def route_channel(data: Dict[str, Any], subscriptions: Dict[str, Any],
+                  channels: Dict[str, Tuple[str, str]]) -> Tuple[Optional[str], Any]:
+    """
+    功能：按消息中的完整频道字符串查找订阅
+    入参：data - 消息数据；subscriptions - 频道字符串 -> 回调或回调元组；channels - 频道字符串 -> (频道类型, 标识符)
+    返回值：(identifier, callbacks) - 未订阅的频道均为None
+    核心规则：两次字典查找，不拆分channel字符串
+    """
+    channel = data.get('channel', '')
+    callbacks = subscriptions.get(channel)
+    if callbacks is None:
+        return None, None
+    return channels[channel][1], callbacks
@@ -0,0 +1,313 @@
+"""
+文件名：batcher.py
+用途：订单批量提交器，将短时间内的多笔下单合并为一次批量交易请求
+依赖：asyncio, itertools, logging, time, dataclasses, typing
+核心功能：1. 按时间窗口/批量大小合并订单；2. ALO（只挂单）订单优先；3. 通过Future回传每笔订单结果
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+class OrderBatcherError(Exception):
+    """订单批量提交相关错误"""
+    pass
+
+
+@dataclass
+class BatchConfig:
+    """
+    功能：批量提交配置
+    入参：interval - 合并窗口（秒）；max_batch_size - 单批最大订单数；
+          prioritize_alo - 只挂单订单是否排在批次前部；max_wait_time - 单笔订单最长等待时间（秒）
+    """
+    interval: float = 0.1
+    max_batch_size: int = 50
+    prioritize_alo: bool = True
+    max_wait_time: float = 0.5
+
+
+@dataclass
+class PendingOrder:
+    """待提交订单（价格和数量均已按精度转换为整数；order_expiry为None时使用SDK默认的28天有效期）"""
+    market_index: int
+    client_order_index: int
+    base_amount: int
+    price: int
+    is_ask: bool
+    order_type: int
+    time_in_force: int
+    reduce_only: bool
+    order_expiry: Optional[int]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class OrderHandle:
+    """
+    功能：批量下单返回的订单句柄
+    入参：client_order_index - 客户端订单索引；future - 批次结果Future
+    返回值：句柄实例，可直接await获取提交结果
+    核心规则：批次响应返回后Future完成；签名或发送失败时抛出OrderBatcherError
+    """
+
+    def __init__(self, client_order_index: int, future: asyncio.Future):
+        self.client_order_index = client_order_index
+        self._future = future
+
+    def done(self) -> bool:
+        """批次是否已返回"""
+        return self._future.done()
+
+    async def result(self) -> Dict[str, Any]:
+        """等待并返回提交结果"""
+        return await self._future
+
+    def __await__(self):
+        return self._future.__await__()
+
+
+class OrderBatcher:
+    """
+    功能：订单批量提交器
+    入参：signer_client - SignerClient实例；config - 批量配置；logger - 日志记录器
+    返回值：批量提交器实例
+    核心规则：1. 每个interval或攒满max_batch_size时提交一批；2. 每笔订单单独签名，一次HTTP请求发送整批
+    """
+
+    def __init__(self, signer_client: Any, config: Optional[BatchConfig] = None,
+                 logger: Optional[logging.Logger] = None):
+        """
+        功能：初始化批量提交器
+        入参：signer_client - SignerClient实例；config - 批量配置；logger - 日志记录器
+        返回值：无
+        核心规则：后台刷新任务在首次提交时启动（需要运行中的事件循环）
+        """
+        self.signer_client = signer_client
+        self.config = config or BatchConfig()
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.pending_orders: List[PendingOrder] = []
+        self._wakeup = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        # 客户端订单索引：以毫秒时间戳为起点递增，避免与历史订单冲突
+        self._client_order_index = itertools.count(int(time.time() * 1000))
+
+    async def submit(self, market_index: int, base_amount: int, price: int, is_ask: bool,
+                     order_type: int, time_in_force: int, reduce_only: bool = False,
+                     order_expiry: Optional[int] = None) -> OrderHandle:
+        """
+        功能：提交一笔订单到待发送队列
+        入参：market_index - 市场ID；base_amount/price - 整数化的数量和价格；is_ask - 是否卖出；
+              order_type - 订单类型；time_in_force - 有效方式；reduce_only - 是否只减仓；
+              order_expiry - 订单过期时间（None表示按订单类型选择）
+        返回值：OrderHandle - 订单句柄
+        核心规则：1. 攒满批量或最早订单等待超过max_wait_time时立即唤醒刷新任务；
+                  2. 市价单和IOC订单未指定过期时间时使用DEFAULT_IOC_EXPIRY（与SDK的create_market_order一致），
+                     其他订单使用SDK默认的28天有效期
+        """
+        if self._closed:
+            raise OrderBatcherError("批量提交器已关闭")
+
+        signer = self.signer_client
+        if order_expiry is None and (order_type == signer.ORDER_TYPE_MARKET
+                                     or time_in_force == signer.ORDER_TIME_IN_FORCE_IMMEDIATE_OR_CANCEL):
+            order_expiry = signer.DEFAULT_IOC_EXPIRY
+
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+        order = PendingOrder(
+            market_index=market_index,
+            client_order_index=next(self._client_order_index),
+            base_amount=base_amount,
+            price=price,
+            is_ask=is_ask,
+            order_type=order_type,
+            time_in_force=time_in_force,
+            reduce_only=reduce_only,
+            order_expiry=order_expiry,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self.pending_orders.append(order)
+
+        oldest_wait = time.monotonic() - self.pending_orders[0].enqueued_at
+        if len(self.pending_orders) >= self.config.max_batch_size or oldest_wait >= self.config.max_wait_time:
+            self._wakeup.set()
+
+        return OrderHandle(order.client_order_index, order.future)
+
+    async def _flush_loop(self):
+        """后台刷新任务：每个interval或被唤醒时提交一批；关闭后提交完剩余订单再退出"""
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.config.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            while self.pending_orders:
+                await self._flush()
+
+    async def _flush(self):
+        """
+        功能：取出一批订单并提交
+        入参：无
+        返回值：无
+        核心规则：提交过程中的任何异常（包括任务被取消）都让本批未完成的订单失败，
+                  不会留下永远不完成的OrderHandle，刷新任务继续处理后续批次
+        """
+        batch = self.pending_orders[:self.config.max_batch_size]
+        del self.pending_orders[:self.config.max_batch_size]
+
+        try:
+            await self._send_batch(batch)
+        except asyncio.CancelledError:
+            self._fail_orders(batch, "批量提交已取消")
+            raise
+        except Exception as e:
+            self.logger.error(f"批量提交异常: {e}")
+            self._fail_orders(batch, f"批量提交异常: {e}")
+
+    @staticmethod
+    def _fail_orders(orders: List[PendingOrder], message: str):
+        """让尚未完成的订单以OrderBatcherError失败（调用方已取消等待的订单跳过）"""
+        for order in orders:
+            if not order.future.done():
+                order.future.set_exception(OrderBatcherError(message))
+
+    async def _send_batch(self, batch: List[PendingOrder]):
+        """
+        功能：签名并发送一批订单
+        入参：batch - 本批订单
+        返回值：无
+        核心规则：1. ALO订单优先排序；2. 签名失败的订单单独失败，不影响同批其他订单；
+                  3. 发送失败时同步签名客户端的nonce管理器，后续交易的nonce不错位
+        """
+        if self.config.prioritize_alo:
+            post_only = self.signer_client.ORDER_TIME_IN_FORCE_POST_ONLY
+            batch.sort(key=lambda order: order.time_in_force != post_only)
+
+        tx_types: List[int] = []
+        tx_infos: List[str] = []
+        signed_orders: List[PendingOrder] = []
+        # 本批每个api_key_index消耗的nonce数量
+        used_nonces: Dict[int, int] = {}
+
+        for order in batch:
+            try:
+                tx_type, tx_info, api_key_index = self._sign_order(order)
+            except Exception as e:
+                self._fail_orders([order], f"订单签名失败: {e}")
+                continue
+
+            tx_types.append(tx_type)
+            tx_infos.append(tx_info)
+            signed_orders.append(order)
+            used_nonces[api_key_index] = used_nonces.get(api_key_index, 0) + 1
+
+        if not signed_orders:
+            return
+
+        try:
+            response = await self.signer_client.send_tx_batch(tx_types, tx_infos)
+            self.logger.debug(f"批量提交完成: {len(signed_orders)} 笔订单")
+        except Exception as e:
+            self.logger.error(f"批量提交失败: {e}")
+            await self._release_nonces(used_nonces)
+            self._fail_orders(signed_orders, f"批量提交失败: {e}")
+            return
+
+        tx_hashes = getattr(response, 'tx_hash', None) or []
+        for i, order in enumerate(signed_orders):
+            if order.future.done():
+                continue
+            order.future.set_result({
+                'status': 'submitted',
+                'client_order_index': order.client_order_index,
+                'market_id': order.market_index,
+                'tx_hash': tx_hashes[i] if i < len(tx_hashes) else None,
+                'code': getattr(response, 'code', None),
+            })
+
+    def _sign_order(self, order: PendingOrder):
+        """
+        功能：使用签名客户端签名单笔订单
+        入参：order - 待提交订单
+        返回值：(tx_type, tx_info)
+        核心规则：1. nonce由签名客户端的nonce管理器顺序分配，保证同批交易nonce连续；
+                  2. 签名失败时立即归还本次nonce（签名是同步的，下一笔订单复用该nonce，不留空洞）
+        """
+        nonce_manager = self.signer_client.nonce_manager
+        api_key_index, nonce = nonce_manager.next_nonce()
+        # 未指定过期时间时不传该参数，使用SDK默认值
+        expiry_kwargs = {} if order.order_expiry is None else {'order_expiry': order.order_expiry}
+        try:
+            signed = self.signer_client.sign_create_order(
+                order.market_index,
+                order.client_order_index,
+                order.base_amount,
+                order.price,
+                order.is_ask,
+                order.order_type,
+                order.time_in_force,
+                order.reduce_only,
+                nonce=nonce,
+                api_key_index=api_key_index,
+                **expiry_kwargs,
+            )
+
+            # 新版SDK返回(tx_type, tx_info, tx_hash, error)，旧版返回(tx_info, error)
+            error = signed[-1]
+            if error:
+                raise OrderBatcherError(error)
+        except Exception:
+            nonce_manager.acknowledge_failure(api_key_index)
+            raise
+
+        if len(signed) == 4:
+            return signed[0], signed[1], api_key_index
+        return self.signer_client.TX_TYPE_CREATE_ORDER, signed[0], api_key_index
+
+    async def _release_nonces(self, used_nonces: Dict[int, int]):
+        """
+        功能：批量发送失败后同步nonce管理器
+        入参：used_nonces - api_key_index -> 本批消耗的nonce数量
+        返回值：无
+        核心规则：1. 优先从交易所重新获取nonce（发送等待期间同一api_key可能已为其他交易分配nonce，逐个回退会错位）；
+                  2. 重新获取失败时逐个归还本批消耗的nonce
+        """
+        nonce_manager = self.signer_client.nonce_manager
+        for api_key_index, count in used_nonces.items():
+            try:
+                await nonce_manager.async_hard_refresh_nonce(api_key_index)
+            except Exception as e:
+                self.logger.warning(f"重新获取nonce失败（api_key_index={api_key_index}）: {e}，归还本批nonce")
+                for _ in range(count):
+                    nonce_manager.acknowledge_failure(api_key_index)
+
+    async def close(self):
+        """
+        功能：关闭批量提交器
+        入参：无
+        返回值：无
+        核心规则：1. 先唤醒并等待后台刷新任务结束（它会提交完剩余订单），避免与其并发提交同一批订单；
+                  2. 刷新任务结束后仍有剩余订单（如任务从未启动）时在此提交
+        """
+        self._closed = True
+
+        if self._flush_task:
+            self._wakeup.set()
+            try:
+                await self._flush_task
+            finally:
+                self._flush_task = None
+
+        while self.pending_orders:
+            await self._flush()
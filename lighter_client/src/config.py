@@ -1,13 +1,31 @@
 """
 文件名：config.py
 用途：Lighter交易所客户端配置管理，处理环境变量加载和验证
-依赖：os, dotenv, typing
-核心功能：1. 从.env文件加载配置；2. 验证配置完整性；3. 提供网络URL获取方法
+依赖：functools, hashlib, logging, os, pickle, sys, pathlib, dotenv, typing
+核心功能：1. 从.env文件加载配置；2. 验证配置完整性；3. 提供网络URL获取方法；4. 编译后配置的磁盘缓存
 """
 
+import functools
+import hashlib
+import logging
 import os
-from typing import Dict, Optional
-from dotenv import load_dotenv
+import pickle
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from dotenv import find_dotenv, load_dotenv
+
+
+logger = logging.getLogger(__name__)
+
+# 编译后配置的缓存目录（默认不启用，设置LIGHTER_CONFIG_CACHE_DIR后才读写缓存）
+CONFIG_CACHE_DIR = os.environ.get('LIGHTER_CONFIG_CACHE_DIR', '')
+
+# 缓存格式版本，LighterConfig属性集合变化时递增，使旧缓存失效
+CONFIG_CACHE_VERSION = 5
+
+# 本进程通过load_dotenv写入os.environ的环境变量（计算缓存键时排除，同进程再次构造仍命中同一缓存）
+_DOTENV_VALUES: Dict[str, str] = {}
 
 
 class ConfigError(Exception):
@@ -35,6 +53,56 @@ class LighterConfig:
     OPTIONAL_KEYS = {
         'LIGHTER_SYMBOL': 'ETH-USDT',
         'LOG_LEVEL': 'INFO',
+        'LIGHTER_WS_TRANSPORT': 'websockets',
+        'LIGHTER_MARKET_INFO_TTL': '300',
+        'LIGHTER_BATCH_ORDERS': 'false',
+        'LIGHTER_BATCH_INTERVAL': '0.1',
+        'LIGHTER_OB_MAX_DEPTH': '0',
+        'LIGHTER_GRPC_URL': '',
+        'LIGHTER_GRPC_PROTO_MODULE': '',
+        'LIGHTER_GRPC_SECURE': 'true',
+        'LIGHTER_DNS_CACHE_TTL': '300',
+        'LIGHTER_CONNECTOR_LIMIT_PER_HOST': '64',
+    }
+    
+    # 不写入配置缓存的属性（环境变量快照、可由其他属性重建的派生值，以及私钥相关的敏感值）
+    _CACHE_EXCLUDED_ATTRS = (
+        '_env', '_str_cache', '_api_keys_dict',
+        'private_key', '_private_key_bytes', '_masked_private_key',
+    )
+    
+    # 不参与缓存键计算的敏感环境变量（其值不写入缓存，每次构造都重新读取）
+    _CACHE_SECRET_KEYS = ('LIGHTER_PRIVATE_KEY',)
+    
+    # __str__结果缓存（首次调用时在实例上生成）
+    _str_cache: Optional[str] = None
+    
+    # 构造参数名 -> 环境变量名
+    PARAM_ENV_KEYS = {
+        'network': 'LIGHTER_NETWORK',
+        'account_index': 'LIGHTER_ACCOUNT_INDEX',
+        'api_key_index': 'LIGHTER_API_KEY_INDEX',
+        'private_key': 'LIGHTER_PRIVATE_KEY',
+        'symbol': 'LIGHTER_SYMBOL',
+        'log_level': 'LOG_LEVEL',
+        'ws_transport': 'LIGHTER_WS_TRANSPORT',
+        'market_info_ttl': 'LIGHTER_MARKET_INFO_TTL',
+        'batch_orders': 'LIGHTER_BATCH_ORDERS',
+        'batch_interval': 'LIGHTER_BATCH_INTERVAL',
+        'ob_max_depth': 'LIGHTER_OB_MAX_DEPTH',
+        'grpc_url': 'LIGHTER_GRPC_URL',
+        'grpc_proto_module': 'LIGHTER_GRPC_PROTO_MODULE',
+        'grpc_secure': 'LIGHTER_GRPC_SECURE',
+        'dns_cache_ttl': 'LIGHTER_DNS_CACHE_TTL',
+        'connector_limit_per_host': 'LIGHTER_CONNECTOR_LIMIT_PER_HOST',
+    }
+    
+    # 网络URL表：network -> (REST地址环境变量, 默认REST地址, WebSocket地址环境变量, 默认WebSocket地址)
+    _NETWORK_URLS = {
+        'mainnet': ('LIGHTER_MAINNET_URL', 'https://mainnet.zklighter.elliot.ai',
+                    'LIGHTER_MAINNET_WS_URL', 'wss://mainnet.zklighter.elliot.ai/stream'),
+        'testnet': ('LIGHTER_TESTNET_URL', 'https://testnet.zklighter.elliot.ai',
+                    'LIGHTER_TESTNET_WS_URL', 'wss://testnet.zklighter.elliot.ai/stream'),
     }
     
     def __init__(self, env_file: Optional[str] = None, **kwargs):
@@ -44,17 +112,32 @@ class LighterConfig:
             env_file - .env文件路径（可选）
             **kwargs - 配置参数（可选），如果提供则覆盖环境变量
         返回值：无
-        核心规则：1. 加载.env文件；2. 使用提供的参数；3. 验证必需配置；4. 设置默认值
+        核心规则：1. 在加载.env之前计算缓存键；2. 加载.env文件（命中缓存时同样加载，os.environ与未命中时一致）；
+                  3. 命中配置缓存时恢复非敏感属性并重新读取私钥；4. 记录提供的参数（优先于环境变量）；5. 快照环境变量；
+                  6. 验证必需配置；7. 设置默认值；8. 写入配置缓存
         """
-        # 加载环境变量
+        # 定位.env文件（未指定或不存在时与load_dotenv()一样向上查找）
         if env_file and os.path.exists(env_file):
-            load_dotenv(env_file)
+            dotenv_path = env_file
         else:
-            # 尝试从当前目录加载.env文件
-            load_dotenv()
+            dotenv_path = find_dotenv()
+        
+        # 未提供覆盖参数时尝试走缓存：缓存键在加载.env之前计算，不受本次加载的副作用影响
+        cache_path = None if kwargs else self._get_cache_path(dotenv_path)
+        
+        # 加载环境变量
+        if dotenv_path:
+            self._load_dotenv(dotenv_path)
+        
+        # 命中缓存时跳过配置校验、类型转换和网络URL分支
+        if cache_path is not None and self._load_from_cache(cache_path):
+            return
+        
+        # 记录构造参数提供的覆盖值
+        self._apply_overrides(kwargs)
         
-        # 如果有提供的参数，设置环境变量
-        self._set_env_from_kwargs(kwargs)
+        # 环境变量快照，后续读取走字典而不是逐项getenv
+        self._env: Dict[str, str] = dict(os.environ)
         
         # 验证必需配置
         self._validate_config()
@@ -64,61 +147,206 @@ class LighterConfig:
         
         # 验证私钥格式
         self._validate_private_key()
+        self._set_api_keys_dict()
+        
+        if cache_path is not None:
+            self._save_to_cache(cache_path)
     
-    def _set_env_from_kwargs(self, kwargs: dict):
-        """从kwargs设置环境变量"""
-        if not kwargs:
-            return
+    @staticmethod
+    def _load_dotenv(dotenv_path: str):
+        """加载.env文件，并记录本次写入os.environ的环境变量（load_dotenv不覆盖已存在的变量）"""
+        before = dict(os.environ)
+        load_dotenv(dotenv_path)
+        _DOTENV_VALUES.update(
+            (key, value) for key, value in os.environ.items() if before.get(key) != value
+        )
+    
+    def _get_cache_path(self, dotenv_path: str) -> Optional[Path]:
+        """
+        功能：计算当前.env文件对应的配置缓存路径
+        入参：dotenv_path - .env文件路径（可为空）
+        返回值：Optional[Path] - 缓存文件路径，缓存禁用或没有.env文件时返回None
+        核心规则：1. 缓存键包含缓存格式版本、.env绝对路径、修改时间以及进程中已有的LIGHTER_*环境变量，
+                  任一变化都会落到新的缓存文件；2. 排除本进程从.env加载的变量和私钥等敏感变量
+        """
+        if not CONFIG_CACHE_DIR or not dotenv_path:
+            return None
         
-        # 映射参数名到环境变量名
-        param_mapping = {
-            'network': 'LIGHTER_NETWORK',
-            'account_index': 'LIGHTER_ACCOUNT_INDEX',
-            'api_key_index': 'LIGHTER_API_KEY_INDEX',
-            'private_key': 'LIGHTER_PRIVATE_KEY',
-            'symbol': 'LIGHTER_SYMBOL',
-            'log_level': 'LOG_LEVEL',
-        }
+        try:
+            dotenv_path = os.path.abspath(dotenv_path)
+            mtime_ns = os.stat(dotenv_path).st_mtime_ns
+        except OSError:
+            return None
+        
+        # load_dotenv不会覆盖已存在的环境变量，因此进程环境也会影响最终配置
+        env_items = sorted(
+            (key, value) for key, value in os.environ.items()
+            if (key.startswith('LIGHTER_') or key in self.OPTIONAL_KEYS)
+            and key not in self._CACHE_SECRET_KEYS and _DOTENV_VALUES.get(key) != value
+        )
+        digest = hashlib.sha256(repr((CONFIG_CACHE_VERSION, dotenv_path, mtime_ns, env_items)).encode()).hexdigest()[:32]
+        return Path(CONFIG_CACHE_DIR).expanduser() / f"{digest}.pkl"
+    
+    def _load_from_cache(self, cache_path: Path) -> bool:
+        """
+        功能：从缓存文件恢复配置属性
+        入参：cache_path - 缓存文件路径
+        返回值：bool - 是否成功恢复
+        核心规则：1. 缓存缺失或损坏时返回False，由调用方走完整加载流程；
+                  2. 缓存不含私钥，恢复后从环境变量读取并校验私钥
+        """
+        try:
+            with open(cache_path, 'rb') as f:
+                attrs = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return False
+        
+        if not isinstance(attrs, dict):
+            return False
         
-        for param_name, env_name in param_mapping.items():
-            if param_name in kwargs:
-                os.environ[env_name] = str(kwargs[param_name])
+        self.__dict__.update(attrs)
+        self.symbol = sys.intern(self.symbol)
+        self._env = dict(os.environ)
+        
+        private_key = self._get_value('private_key')
+        if private_key in (None, ''):
+            raise ConfigError("缺少必需配置项: LIGHTER_PRIVATE_KEY")
+        self.private_key = str(private_key)
+        self._validate_private_key()
+        self._set_api_keys_dict()
+        return True
+    
+    def _save_to_cache(self, cache_path: Path):
+        """
+        功能：将已验证的配置属性写入缓存文件
+        入参：cache_path - 缓存文件路径
+        返回值：无
+        核心规则：1. 不缓存_CACHE_EXCLUDED_ATTRS中的派生属性和私钥；2. 文件权限0600；3. 先写临时文件再原子替换；4. 写入失败不影响使用
+        """
+        attrs = {key: value for key, value in self.__dict__.items() if key not in self._CACHE_EXCLUDED_ATTRS}
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(attrs, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except (OSError, pickle.PicklingError):
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+    
+    def _apply_overrides(self, kwargs: dict):
+        """
+        功能：记录构造参数提供的覆盖值
+        入参：kwargs - 配置参数
+        返回值：无
+        核心规则：1. 覆盖值保存在实例上，不写入os.environ（不影响同进程后续构造的配置）；
+                  2. 保留原始类型，读取时不再经过str/int往返；3. 值为None的参数视为未提供
+        """
+        self._overrides: Dict[str, Any] = {
+            param_name: kwargs[param_name]
+            for param_name in self.PARAM_ENV_KEYS
+            if kwargs.get(param_name) is not None
+        }
+    
+    def _get_value(self, param_name: str) -> Any:
+        """按 覆盖参数 > 环境变量 > 默认值 的优先级读取配置项"""
+        if param_name in self._overrides:
+            return self._overrides[param_name]
+        env_key = self.PARAM_ENV_KEYS[param_name]
+        return self._env.get(env_key, self.OPTIONAL_KEYS.get(env_key))
     
     def _validate_config(self):
         """验证必需配置项是否存在"""
         missing_keys = []
-        for key in self.REQUIRED_KEYS:
-            if not os.getenv(key):
-                missing_keys.append(key)
+        for param_name, env_key in self.PARAM_ENV_KEYS.items():
+            if env_key in self.REQUIRED_KEYS and self._get_value(param_name) in (None, ''):
+                missing_keys.append(env_key)
         
         if missing_keys:
             raise ConfigError(f"缺少必需配置项: {', '.join(missing_keys)}")
     
     def _set_config_values(self):
         """设置配置属性"""
+        get = self._get_value
+        
         # 必需配置项
-        self.network = os.getenv('LIGHTER_NETWORK').lower()
-        self.account_index = int(os.getenv('LIGHTER_ACCOUNT_INDEX'))
-        self.api_key_index = int(os.getenv('LIGHTER_API_KEY_INDEX'))
-        self.private_key = os.getenv('LIGHTER_PRIVATE_KEY')
+        self.network = str(get('network')).lower()
+        self.account_index = int(get('account_index'))
+        self.api_key_index = int(get('api_key_index'))
+        self.private_key = str(get('private_key'))
         
         # 可选配置项（使用默认值）
-        self.symbol = os.getenv('LIGHTER_SYMBOL', self.OPTIONAL_KEYS['LIGHTER_SYMBOL'])
-        self.log_level = os.getenv('LOG_LEVEL', self.OPTIONAL_KEYS['LOG_LEVEL'])
+        self.symbol = sys.intern(str(get('symbol')))
+        self.log_level = str(get('log_level'))
+        self.ws_transport = str(get('ws_transport')).lower()
+        self.market_info_ttl = float(get('market_info_ttl'))
+        self.batch_orders = str(get('batch_orders')).lower() in ('1', 'true', 'yes')
+        self.batch_interval = float(get('batch_interval'))
+        self.ob_max_depth = int(get('ob_max_depth'))
+        self.grpc_url = str(get('grpc_url'))
+        self.grpc_proto_module = str(get('grpc_proto_module'))
+        self.grpc_secure = str(get('grpc_secure')).lower() in ('1', 'true', 'yes')
+        self.dns_cache_ttl = int(get('dns_cache_ttl'))
+        self.connector_limit_per_host = int(get('connector_limit_per_host'))
         
         # 网络URL配置
         self._set_network_urls()
     
     def _set_network_urls(self):
-        """设置网络URL"""
-        if self.network == 'mainnet':
-            self.rest_url = os.getenv('LIGHTER_MAINNET_URL', 'https://mainnet.zklighter.elliot.ai')
-            self.ws_url = os.getenv('LIGHTER_MAINNET_WS_URL', 'wss://mainnet.zklighter.elliot.ai/stream')
-        elif self.network == 'testnet':
-            self.rest_url = os.getenv('LIGHTER_TESTNET_URL', 'https://testnet.zklighter.elliot.ai')
-            self.ws_url = os.getenv('LIGHTER_TESTNET_WS_URL', 'wss://testnet.zklighter.elliot.ai/stream')
-        else:
-            raise ConfigError(f"未知的网络类型: {self.network}，支持: mainnet, testnet")
+        """设置网络URL（查表，未知网络直接报错）"""
+        entry = self._NETWORK_URLS.get(self.network)
+        if entry is None:
+            raise ConfigError(f"未知的网络类型: {self.network}，支持: {', '.join(self._NETWORK_URLS)}")
+        
+        rest_key, rest_default, ws_key, ws_default = entry
+        self.rest_url = self._env.get(rest_key, rest_default)
+        self.ws_url = self._env.get(ws_key, ws_default)
+    
+    @staticmethod
+    def _keep_signer_key(private_key: str) -> str:
+        """40字符私钥（SignerClient格式，20字节），原样使用"""
+        logger.debug("使用40字符私钥（SignerClient格式）")
+        return private_key
+    
+    @staticmethod
+    def _truncate_ecdsa_key(private_key: str) -> str:
+        """标准64字符ECDSA私钥（32字节），截取前40字符"""
+        logger.warning("检测到64字符私钥，SignerClient可能需要40字符格式")
+        private_key = private_key[:40]
+        logger.warning("截取前40字符: %s...%s", private_key[:8], private_key[-8:])
+        return private_key
+    
+    @staticmethod
+    def _truncate_key(private_key: str) -> str:
+        """超过40字符的私钥（如66字符可能包含额外的校验字符），截取前40字符；不足40字符报错"""
+        key_length = len(private_key)
+        if key_length < 40:
+            raise ConfigError(f"私钥长度不足: {key_length}，至少需要40个字符（不带0x前缀）")
+        private_key = private_key[:40]
+        logger.warning("私钥长度%d，截取前40字符: %s...%s", key_length, private_key[:8], private_key[-8:])
+        return private_key
+    
+    @staticmethod
+    def _keep_full_key(private_key: str) -> str:
+        """
+        80字符私钥，整体使用
+        虽然SignerClient文档说期望40字符，但实际可能接受80字符，或者C库会自己处理截断；
+        如果失败，用户需要提供正确的40字符私钥
+        """
+        logger.debug("处理80字符私钥: %s...%s", private_key[:16], private_key[-16:])
+        logger.warning("尝试使用整个80字符字符串作为私钥，跳过标准长度验证")
+        return private_key
+    
+    # 私钥长度 -> 处理函数（未列出的长度走_truncate_key）
+    _KEY_HANDLERS: Dict[int, Callable[[str], str]] = {
+        40: _keep_signer_key,
+        64: _truncate_ecdsa_key,
+        66: _truncate_key,
+        80: _keep_full_key,
+    }
     
     def _validate_private_key(self):
         """
@@ -127,9 +355,11 @@ class LighterConfig:
         返回值：无
         核心规则：
         1. SignerClient期望40字符私钥（20字节）
-        2. 标准ECDSA私钥是64字符（32字节）
-        3. 支持从长字符串中提取有效私钥
+        2. 按长度查表选择处理函数：40原样使用，64/66截取前40字符，80整体使用，其他长度截取或报错
+        3. 处理函数只会返回40或80字符，无需再次校验长度
         4. 自动处理0x前缀
+        5. 用bytes.fromhex校验十六进制，解码后的字节保存在_private_key_bytes
+        6. 处理过程写入日志（截断类提示为WARNING，其余为DEBUG），不直接输出到stdout
         """
         if not self.private_key:
             raise ConfigError("私钥不能为空")
@@ -138,80 +368,31 @@ class LighterConfig:
         if self.private_key.startswith('0x'):
             self.private_key = self.private_key[2:]
         
-        # 检查私钥长度
-        key_length = len(self.private_key)
-        
-        # 根据SignerClient要求，优先使用40字符私钥
-        # 但也要支持其他常见格式
-        if key_length == 40:
-            # SignerClient期望的40字符私钥（20字节）
-            print(f"✅ 使用40字符私钥（SignerClient格式）")
-            pass
-        elif key_length == 64:
-            # 标准64字符ECDSA私钥（32字节）
-            print(f"⚠️  检测到64字符私钥，SignerClient可能需要40字符格式")
-            # 尝试从64字符中提取40字符
-            # 通常前40字符或后40字符可能是有效的
-            self.private_key = self.private_key[:40]
-            print(f"⚠️  截取前40字符: {self.private_key[:8]}...{self.private_key[-8:]}")
-        elif key_length == 66:
-            # 可能包含额外的校验字符
-            self.private_key = self.private_key[:40]
-            print(f"⚠️  私钥长度66，截取前40字符: {self.private_key[:8]}...{self.private_key[-8:]}")
-        elif key_length == 80:
-            # 用户提供的80字符私钥
-            # 根据错误信息分析，可能是以下情况之一：
-            # 1. 整个80字符字符串就是私钥（但SignerClient期望40字符）
-            # 2. 80字符包含两个40字符的私钥，需要选择正确的一个
-            # 3. 80字符是其他格式，需要特殊处理
-            
-            print(f"🔍 处理80字符私钥...")
-            print(f"  原始私钥: {self.private_key[:16]}...{self.private_key[-16:]}")
-            
-            # 尝试策略：使用整个80字符字符串
-            # 虽然SignerClient文档说期望40字符，但实际可能接受80字符
-            # 或者C库会自己处理截断
-            
-            # 先尝试整个80字符
-            original_80 = self.private_key
-            self.private_key = original_80
-            print(f"⚠️  尝试使用整个80字符字符串作为私钥")
-            print(f"  长度: {len(self.private_key)} 字符")
-            
-            # 注意：这可能会失败，因为SignerClient期望40字符
-            # 但如果失败，用户需要提供正确的40字符私钥
-        else:
-            # 对于其他长度，尝试提取40字符
-            if key_length > 40:
-                self.private_key = self.private_key[:40]
-                print(f"⚠️  私钥长度{key_length}，截取前40字符: {self.private_key[:8]}...{self.private_key[-8:]}")
-            else:
-                raise ConfigError(f"私钥长度不足: {key_length}，至少需要40个字符（不带0x前缀）")
-        
-        # 检查是否为有效的十六进制字符串
+        handler = self._KEY_HANDLERS.get(len(self.private_key), self._truncate_key)
+        self.private_key = handler(self.private_key)
+        
+        # 检查是否为有效的十六进制字符串，解码结果保留给需要原始字节的调用方
         try:
-            int(self.private_key, 16)
+            self._private_key_bytes = bytes.fromhex(self.private_key)
         except ValueError:
             raise ConfigError("私钥包含无效的十六进制字符")
         
-        # 最终验证长度
-        # 对于80字符私钥，我们允许使用整个字符串
-        if key_length == 80:
-            # 80字符私钥，不验证长度
-            print(f"⚠️  使用80字符私钥，跳过标准长度验证")
-        elif len(self.private_key) != 40:
-            raise ConfigError(f"私钥处理后的长度不正确: {len(self.private_key)}，应为40个字符（SignerClient格式）")
-        
-        print(f"✅ 私钥验证通过: {self.private_key[:8]}...{self.private_key[-8:]}")
+        # 脱敏后的私钥只计算一次，to_dict/__str__直接复用
+        self._masked_private_key = f"{self.private_key[:8]}...{self.private_key[-8:]}"
+        logger.debug("私钥验证通过: %s", self._masked_private_key)
+    
+    def _set_api_keys_dict(self):
+        """生成API密钥字典模板（api_key_index和private_key在构造后不再变化）"""
+        self._api_keys_dict = {self.api_key_index: self.private_key}
     
     def get_api_keys_dict(self) -> Dict[int, str]:
         """
         功能：获取API密钥字典，用于SignerClient初始化
         入参：无
-        返回值：Dict[int, str] - API密钥索引到私钥的映射
-        核心规则：使用配置中的api_key_index和private_key创建字典
+        返回值：Dict[int, str] - API密钥索引到私钥的字典
+        核心规则：返回构造时生成的模板的浅拷贝：SignerClient会原地修改传入的字典，调用方修改返回值不影响配置
         """
-        return {self.api_key_index: self.private_key}
+        return dict(self._api_keys_dict)
     
     def to_dict(self) -> Dict[str, str]:
         """返回配置字典（用于调试）"""
@@ -219,21 +400,33 @@ class LighterConfig:
             'network': self.network,
             'account_index': self.account_index,
             'api_key_index': self.api_key_index,
-            'private_key': f"{self.private_key[:8]}...{self.private_key[-8:]}" if self.private_key else None,
+            'private_key': self._masked_private_key,
             'symbol': self.symbol,
             'log_level': self.log_level,
             'rest_url': self.rest_url,
             'ws_url': self.ws_url,
+            'ws_transport': self.ws_transport,
+            'market_info_ttl': self.market_info_ttl,
+            'batch_orders': self.batch_orders,
+            'batch_interval': self.batch_interval,
+            'ob_max_depth': self.ob_max_depth,
+            'grpc_url': self.grpc_url or None,
+            'grpc_secure': self.grpc_secure,
+            'dns_cache_ttl': self.dns_cache_ttl,
+            'connector_limit_per_host': self.connector_limit_per_host,
         }
     
     def __str__(self) -> str:
-        """返回配置的字符串表示"""
-        config_dict = self.to_dict()
-        return "\n".join([f"{key}: {value}" for key, value in config_dict.items()])
+        """返回配置的字符串表示（配置构造后不再变化，首次生成后缓存）"""
+        if self._str_cache is None:
+            self._str_cache = "\n".join([f"{key}: {value}" for key, value in self.to_dict().items()])
+        return self._str_cache
 
 
-# 全局配置实例
-_config_instance: Optional[LighterConfig] = None
+@functools.lru_cache(maxsize=None)
+def _build_config(env_file: Optional[str]) -> LighterConfig:
+    """按.env文件路径构造并缓存配置实例"""
+    return LighterConfig(env_file)
 
 
 def get_config(env_file: Optional[str] = None) -> LighterConfig:
@@ -241,9 +434,6 @@ def get_config(env_file: Optional[str] = None) -> LighterConfig:
     功能：获取全局配置实例（单例模式）
     入参：env_file - .env文件路径（可选）
     返回值：LighterConfig实例
-    核心规则：如果实例不存在则创建，否则返回现有实例
+    核心规则：每个env_file路径只构造一次，之后直接返回缓存的实例
     """
-    global _config_instance
-    if _config_instance is None:
-        _config_instance = LighterConfig(env_file)
-    return _config_instance
+    return _build_config(env_file)
@@ -0,0 +1,242 @@
+"""
+文件名：grpc_client.py
+用途：Lighter交易所gRPC流式客户端，以protobuf替代JSON接收订单簿推送
+依赖：grpc（可选）, protobuf, asyncio, importlib, logging, typing, local_order_book
+核心功能：1. HTTP/2长连接与keepalive配置；2. 订单簿流式订阅；3. 推送数据转换为与WebSocket一致的字典
+注意事项：交易所未公开protobuf定义，需通过LIGHTER_GRPC_PROTO_MODULE指定生成的*_pb2模块
+"""
+
+import asyncio
+import importlib
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Union
+
+from .local_order_book import LocalOrderBook, CLocalOrderBook, create_order_book
+
+try:
+    import grpc
+    from google.protobuf.json_format import MessageToDict
+    GRPC_AVAILABLE = True
+except ImportError:
+    grpc = None
+    MessageToDict = None
+    GRPC_AVAILABLE = False
+
+
+# HTTP/2 keepalive配置：3秒探测一次，1秒无响应判定断线，空闲时也保持探测
+GRPC_OPTIONS = [
+    ('grpc.keepalive_time_ms', 3000),
+    ('grpc.keepalive_timeout_ms', 1000),
+    ('grpc.keepalive_permit_without_calls', True),
+    ('grpc.http2.min_time_between_pings_ms', 3000),
+    ('grpc.max_receive_message_length', 64 * 1024 * 1024),
+]
+
+# 默认订单簿流式方法
+DEFAULT_STREAM_METHOD = '/lighter.v1.Query/StreamOrderbookUpdates'
+
+
+class GrpcClientError(Exception):
+    """gRPC客户端相关错误"""
+    pass
+
+
+class GrpcLighterClient:
+    """
+    功能：Lighter交易所gRPC流式客户端
+    入参：grpc_url - gRPC服务地址；proto_module - protobuf生成模块名；logger - 日志记录器；
+          secure - 是否使用TLS；stream_method - 流式方法全名；ob_max_depth - 本地订单簿每侧最大档位数
+    返回值：gRPC客户端实例
+    核心规则：1. 单条HTTP/2长连接多路复用所有订阅；2. 回调签名与WebSocket订阅一致；
+              3. 流中断或结束时丢弃该市场的本地订单簿，并通过on_stream_closed交出回调，由调用方改用其他通道订阅
+    """
+
+    def __init__(self, grpc_url: str, proto_module: str, logger: Optional[logging.Logger] = None,
+                 secure: bool = True, stream_method: str = DEFAULT_STREAM_METHOD, ob_max_depth: int = 0):
+        """
+        功能：初始化gRPC客户端
+        入参：grpc_url - gRPC服务地址；proto_module - protobuf生成模块名；logger - 日志记录器；
+              secure - 是否使用TLS；stream_method - 流式方法全名；ob_max_depth - 本地订单簿每侧最大档位数
+        返回值：无
+        核心规则：从proto_module加载StreamOrderbookUpdatesRequest/Response消息类型
+        """
+        if not GRPC_AVAILABLE:
+            raise GrpcClientError("未安装grpcio，无法使用gRPC客户端")
+
+        self.grpc_url = grpc_url
+        self.logger = logger or logging.getLogger(__name__)
+        self.secure = secure
+        self.stream_method = stream_method
+        self.ob_max_depth = ob_max_depth
+
+        try:
+            module = importlib.import_module(proto_module)
+            self.request_type = module.StreamOrderbookUpdatesRequest
+            self.response_type = module.StreamOrderbookUpdatesResponse
+        except (ImportError, AttributeError) as e:
+            raise GrpcClientError(f"加载protobuf模块失败: {proto_module}, 错误: {e}")
+
+        self.channel = None
+        self._stream = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+        # 订阅回调与本地订单簿：market_id -> ...
+        self.subscriptions: Dict[str, List[Callable]] = {}
+        self.order_books: Dict[str, Union[CLocalOrderBook, LocalOrderBook]] = {}
+
+        # 订单簿订阅深度：market_id -> top_n（gRPC流不按深度裁剪，流终止后随回调交给on_stream_closed）
+        self.order_book_top_n: Dict[str, int] = {}
+
+        # 流已中断或结束的市场（不再通过gRPC订阅）
+        self.failed_markets: Set[str] = set()
+
+        # 流中断或结束时的通知回调：(market_id, 该市场的订阅回调列表, 订阅深度top_n)
+        self.on_stream_closed: Optional[Callable[[str, List[Callable], int], Awaitable[None]]] = None
+
+        self.logger.debug(f"gRPC客户端初始化完成，URL: {grpc_url}")
+
+    async def connect(self) -> bool:
+        """
+        功能：建立gRPC通道
+        入参：无
+        返回值：bool - 通道是否就绪
+        核心规则：1. 等待通道进入READY状态，超时视为连接失败；2. 超时或其他异常时关闭已创建的通道
+        """
+        if self.secure:
+            self.channel = grpc.aio.secure_channel(self.grpc_url, grpc.ssl_channel_credentials(), GRPC_OPTIONS)
+        else:
+            self.channel = grpc.aio.insecure_channel(self.grpc_url, GRPC_OPTIONS)
+
+        try:
+            self._stream = self.channel.unary_stream(
+                self.stream_method,
+                request_serializer=self.request_type.SerializeToString,
+                response_deserializer=self.response_type.FromString,
+            )
+            await asyncio.wait_for(self.channel.channel_ready(), timeout=5)
+            self.logger.info(f"gRPC连接成功: {self.grpc_url}")
+            return True
+        except asyncio.TimeoutError:
+            self.logger.error(f"gRPC连接超时: {self.grpc_url}")
+            await self.close()
+            return False
+        except BaseException:
+            await self.close()
+            raise
+
+    def is_connected(self) -> bool:
+        """检查通道是否已建立"""
+        return self.channel is not None
+
+    def is_stream_live(self, market_id: str) -> bool:
+        """检查指定市场的订单簿流是否仍在运行"""
+        task = self._tasks.get(market_id)
+        return task is not None and not task.done()
+
+    def is_stream_failed(self, market_id: str) -> bool:
+        """检查指定市场的订单簿流是否已中断或结束"""
+        return market_id in self.failed_markets
+
+    async def subscribe_order_book(self, market_id: str, callback: Callable, top_n: int = 0) -> bool:
+        """
+        功能：订阅订单簿流
+        入参：market_id - 市场ID；callback - 回调函数（event_type, data）；top_n - 回调只需要的前N档（0表示全部）
+        返回值：bool - 订阅是否成功
+        核心规则：1. 每个市场一个流式任务，同一市场的多个回调共享该流；
+                  2. top_n与WebSocket一致按市场记录，流终止后回退订阅时沿用
+        """
+        if not self.is_connected():
+            self.logger.error("gRPC未连接，无法订阅")
+            return False
+
+        self.subscriptions.setdefault(market_id, []).append(callback)
+        if top_n > 0:
+            self.order_book_top_n[market_id] = top_n
+        if market_id not in self._tasks:
+            self._tasks[market_id] = asyncio.create_task(self._consume_order_book(market_id))
+
+        self.logger.info(f"发送gRPC订阅请求: order_book/{market_id}")
+        return True
+
+    async def _consume_order_book(self, market_id: str):
+        """
+        功能：消费订单簿流式推送
+        入参：market_id - 市场ID
+        返回值：无
+        核心规则：1. 首条消息作为快照；2. 之后的消息作为增量；3. 回调数据格式与WebSocket一致；
+                  4. 流中断或服务端结束流时丢弃本地订单簿，并把该市场的回调交给on_stream_closed（主动关闭时不通知）
+        """
+        request = self.request_type(market_ids=[int(market_id)])
+        channel = f"order_book:{market_id}"
+        event_type = 'subscribed'
+
+        try:
+            async for response in self._stream(request):
+                payload = MessageToDict(response, preserving_proto_field_name=True)
+                book_payload = payload.get('order_book') or payload
+
+                book = self.order_books.get(market_id)
+                if book is None:
+                    book = self.order_books[market_id] = create_order_book(market_id, self.ob_max_depth)
+                if event_type == 'subscribed':
+                    book.reset(book_payload.get('asks', []), book_payload.get('bids', []))
+                else:
+                    book.apply(book_payload.get('asks', []), book_payload.get('bids', []))
+
+                data = {
+                    'type': f"{event_type}/order_book",
+                    'channel': channel,
+                    'order_book': book_payload,
+                    'book': book,
+                }
+                for callback in self.subscriptions.get(market_id, []):
+                    try:
+                        await callback(event_type, data)
+                    except Exception as e:
+                        self.logger.error(f"gRPC订单簿回调执行失败: {e}")
+
+                event_type = 'update'
+
+            self.logger.warning(f"gRPC订单簿流已结束: market_id={market_id}")
+        except asyncio.CancelledError:
+            self._tasks.pop(market_id, None)
+            raise
+        except Exception as e:
+            self.logger.error(f"gRPC订单簿流中断: market_id={market_id}, 错误: {e}")
+
+        # 流已终止：本地订单簿不再更新，不能继续作为实时数据使用
+        self._tasks.pop(market_id, None)
+        self.order_books.pop(market_id, None)
+        self.failed_markets.add(market_id)
+        callbacks = self.subscriptions.pop(market_id, [])
+        top_n = self.order_book_top_n.pop(market_id, 0)
+
+        if callbacks and self.on_stream_closed is not None:
+            try:
+                await self.on_stream_closed(market_id, callbacks, top_n)
+            except Exception as e:
+                self.logger.error(f"gRPC订单簿流中断后回退订阅失败: market_id={market_id}, 错误: {e}")
+
+    def get_local_order_book(self, market_id: str) -> Optional[Union[CLocalOrderBook, LocalOrderBook]]:
+        """获取指定市场的本地订单簿（未订阅或流已终止时返回None）"""
+        if not self.is_stream_live(market_id):
+            return None
+        return self.order_books.get(market_id)
+
+    async def close(self):
+        """
+        功能：关闭gRPC客户端
+        入参：无
+        返回值：无
+        核心规则：先取消流式任务，再关闭通道
+        """
+        for task in list(self._tasks.values()):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+        if self.channel:
+            await self.channel.close()
+            self.channel = None
+            self.logger.info("gRPC连接已关闭")
@@ -6,21 +6,255 @@
 """
 
 import asyncio
+import functools
 import logging
-from typing import Dict, Optional, Any, Callable
-from lighter.api_client import ApiClient
-from lighter.configuration import Configuration
-from lighter.api.account_api import AccountApi
-from lighter.api.order_api import OrderApi
-from lighter.api.transaction_api import TransactionApi
-from lighter.api.candlestick_api import CandlestickApi
-from lighter.api.block_api import BlockApi
-from lighter.api.funding_api import FundingApi
-from lighter.api.info_api import InfoApi
+import operator
+import os
+import ssl
+import sys
+import time
+import weakref
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Callable, Tuple, Union
+import aiohttp
+from dataclasses import dataclass, replace
+
+if TYPE_CHECKING:
+    from lighter.api_client import ApiClient
 
 from .config import get_config, LighterConfig
 from .precision_manager import PrecisionManager
 from .websocket_client import LighterWebSocketClient
+from .batcher import OrderBatcher, BatchConfig, OrderHandle
+from .grpc_client import GrpcLighterClient
+from .local_order_book import C_ORDER_BOOK_AVAILABLE
+
+
+# 模块级REST客户端池：rest_url -> [ApiClient, 引用计数]
+# 同一进程内指向同一REST地址的多个LighterClient共享一个aiohttp会话，复用TCP/TLS连接
+_API_CLIENT_POOL: Dict[str, List[Any]] = {}
+
+# CPython 3.12.7之前SSL连接中止时可能泄漏传输对象，需要连接器主动清理（新版本aiohttp会忽略该参数并告警）
+_NEEDS_CLEANUP_CLOSED = sys.version_info < (3, 12, 7)
+
+# 从SDK内部会话分离出的连接器（同步的__init__中无法await，推迟到异步的initialize/close中关闭）
+_DETACHED_CONNECTORS: List[aiohttp.BaseConnector] = []
+
+
+try:
+    # aiodns为可选依赖：异步DNS解析，未安装时使用aiohttp默认的线程池解析
+    import aiodns  # noqa: F401
+    AIODNS_AVAILABLE = True
+except ImportError:
+    AIODNS_AVAILABLE = False
+
+
+@functools.lru_cache(maxsize=None)
+def _resolved_signer_dir() -> Optional[str]:
+    """
+    功能：查找本地lighter-python源码目录
+    入参：无
+    返回值：Optional[str] - 第一个包含lighter包的候选目录，均不存在时返回None
+    核心规则：候选目录的stat检查全进程只执行一次
+    """
+    possible_paths = [
+        '/root/myapp/simpleapp2/lighter-python',
+        os.path.join(os.path.dirname(__file__), '..', '..', 'lighter-python'),
+        os.path.join(os.getcwd(), 'lighter-python'),
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'lighter-python'),
+    ]
+    for path in possible_paths:
+        if os.path.isdir(os.path.join(path, 'lighter')):
+            return path
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def _discover_signer_class() -> Optional[type]:
+    """
+    功能：查找并导入签名客户端类
+    入参：无
+    返回值：Optional[type] - SignerClient类，找不到时返回None
+    核心规则：1. 存在本地lighter-python目录时优先从该目录导入；2. 否则使用已安装的lighter包；3. 结果（包括失败）全进程只计算一次
+    """
+    logger = logging.getLogger(__name__)
+    
+    # 确保 lighter-python 目录在 Python 路径中
+    lighter_python_path = _resolved_signer_dir()
+    if lighter_python_path and lighter_python_path not in sys.path:
+        sys.path.insert(0, lighter_python_path)
+        logger.debug(f"已将 lighter-python 目录添加到 Python 路径: {lighter_python_path}")
+    
+    try:
+        from lighter.signer_client import SignerClient
+        logger.debug("从 lighter.signer_client 导入成功")
+        return SignerClient
+    except ImportError as e:
+        logger.debug(f"导入 lighter.signer_client 失败: {e}")
+        return None
+
+
+def _sdk_ssl_context(api_config) -> ssl.SSLContext:
+    """
+    功能：按SDK配置构造SSL上下文（与lighter.rest.RESTClientObject的构造逻辑一致）
+    入参：api_config - lighter.configuration.Configuration实例
+    返回值：ssl.SSLContext - SSL上下文
+    核心规则：1. ssl_ca_cert指定CA证书；2. cert_file/key_file加载客户端证书；3. verify_ssl为False时关闭校验
+    """
+    ssl_context = ssl.create_default_context(cafile=api_config.ssl_ca_cert)
+    if api_config.cert_file:
+        ssl_context.load_cert_chain(api_config.cert_file, keyfile=api_config.key_file)
+    if not api_config.verify_ssl:
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+    return ssl_context
+
+
+def _warmup_order_book_kernels():
+    """
+    功能：导入并预热订单簿合并内核
+    入参：无
+    返回值：无
+    核心规则：1. 在工作线程中执行（导入numba和JIT编译耗时数百毫秒，不能阻塞事件循环）；
+              2. 使用AOT预编译内核时无需预热
+    """
+    from . import _ob_kernels
+    
+    if not _ob_kernels.AOT_AVAILABLE:
+        _ob_kernels.warmup()
+
+
+async def _close_detached_connectors():
+    """关闭从SDK内部会话分离出的连接器（尚未建立连接，关闭不涉及网络操作）"""
+    while _DETACHED_CONNECTORS:
+        await _DETACHED_CONNECTORS.pop().close()
+
+
+def _create_api_client(rest_url: str, dns_cache_ttl: int, limit_per_host: int) -> "ApiClient":
+    """
+    功能：创建REST API客户端，并替换为带DNS缓存和Happy Eyeballs的连接器
+    入参：rest_url - REST API地址；dns_cache_ttl - DNS缓存有效期（秒）；limit_per_host - 单主机最大并发连接数（0表示不限制）
+    返回值：ApiClient - API客户端
+    核心规则：1. SDK内部会话尚未建立连接，分离后记入_DETACHED_CONNECTORS，由initialize/close异步关闭；
+              2. 保留SDK的连接数上限和SSL配置（CA证书、客户端证书、verify_ssl）；3. 重试客户端改为绑定新会话；
+              4. 限制单主机并发连接数，并发请求时复用keep-alive连接，避免集中TLS握手
+    """
+    # lighter SDK导入较重，推迟到首次创建客户端时
+    from lighter.api_client import ApiClient
+    from lighter.configuration import Configuration
+    
+    api_config = Configuration(host=rest_url)
+    api_client = ApiClient(configuration=api_config)
+    rest_client = api_client.rest_client
+    
+    old_session = rest_client.pool_manager
+    _DETACHED_CONNECTORS.append(old_session.connector)
+    old_session.detach()
+    
+    connector = aiohttp.TCPConnector(
+        limit=api_config.connection_pool_maxsize,
+        limit_per_host=limit_per_host,
+        enable_cleanup_closed=_NEEDS_CLEANUP_CLOSED,
+        ssl=_sdk_ssl_context(api_config),
+        resolver=aiohttp.AsyncResolver() if AIODNS_AVAILABLE else None,
+        ttl_dns_cache=dns_cache_ttl,
+        family=0,
+        happy_eyeballs_delay=0.25,
+    )
+    session = aiohttp.ClientSession(connector=connector, trust_env=True)
+    rest_client.pool_manager = session
+    
+    # 配置了retries时SDK通过retry_client发请求，需绑定到新会话（原重试客户端引用的是已分离的会话）
+    if rest_client.retry_client is not None:
+        import aiohttp_retry
+        rest_client.retry_client = aiohttp_retry.RetryClient(
+            client_session=session, retry_options=rest_client.retry_client.retry_options
+        )
+    return api_client
+
+
+def _acquire_api_client(rest_url: str, dns_cache_ttl: int = 300, limit_per_host: int = 64) -> "ApiClient":
+    """
+    功能：从连接池获取REST API客户端
+    入参：rest_url - REST API地址；dns_cache_ttl - DNS缓存有效期（秒，仅创建时生效）；
+          limit_per_host - 单主机最大并发连接数（仅创建时生效）
+    返回值：ApiClient - 共享的API客户端
+    核心规则：池中不存在时创建，每次获取引用计数加1
+    """
+    entry = _API_CLIENT_POOL.get(rest_url)
+    if entry is None:
+        entry = _API_CLIENT_POOL[rest_url] = [_create_api_client(rest_url, dns_cache_ttl, limit_per_host), 0]
+    entry[1] += 1
+    return entry[0]
+
+
+async def _release_api_client(rest_url: str):
+    """
+    功能：归还REST API客户端
+    入参：rest_url - REST API地址
+    返回值：无
+    核心规则：引用计数归零时关闭会话并移出连接池
+    """
+    entry = _API_CLIENT_POOL.get(rest_url)
+    if entry is None:
+        return
+    entry[1] -= 1
+    if entry[1] <= 0:
+        del _API_CLIENT_POOL[rest_url]
+        await entry[0].close()
+
+
+# 初始化时预取的订单簿深度（与get_order_book默认深度一致）
+INITIAL_BOOK_DEPTH = 10
+
+# 初始化时预取的订单簿快照的有效期（秒），超过后不再使用，改走REST获取最新数据
+INITIAL_BOOK_TTL = 2.0
+
+# REST订单簿每档取值：(价格, 剩余数量)
+_LEVEL_GETTER = operator.attrgetter('price', 'remaining_base_amount')
+
+# 获取市场信息失败时默认值的缓存时间（秒），避免失败期间每次调用都重新请求
+MARKET_INFO_NEGATIVE_TTL = 5.0
+
+# 市价单未指定价格时的默认最大滑点（相对对手方最优价，与SDK create_market_order_limited_slippage的推导一致）
+MARKET_ORDER_MAX_SLIPPAGE = 0.01
+
+
+@dataclass(slots=True, frozen=True)
+class MarketInfo:
+    """
+    功能：交易对市场信息（缓存与下单路径使用的字段）
+    入参：symbol - 交易对符号；market_id - 市场ID；price_precision - 价格精度；quantity_precision - 数量精度；
+          min_quantity - 最小下单数量；min_notional - 最小交易额
+    """
+    symbol: str
+    market_id: int
+    price_precision: int
+    quantity_precision: int
+    min_quantity: float
+    min_notional: float
+    
+    @classmethod
+    def from_dict(cls, info: Dict[str, Any]) -> "MarketInfo":
+        """从精度管理器返回的市场信息字典构造（缺失字段使用默认值）"""
+        return cls(
+            symbol=info.get('symbol', _DEFAULT_MARKET_INFO.symbol),
+            market_id=int(info.get('market_id', _DEFAULT_MARKET_INFO.market_id)),
+            price_precision=int(info.get('price_precision', _DEFAULT_MARKET_INFO.price_precision)),
+            quantity_precision=int(info.get('quantity_precision', _DEFAULT_MARKET_INFO.quantity_precision)),
+            min_quantity=float(info.get('min_quantity', _DEFAULT_MARKET_INFO.min_quantity)),
+            min_notional=float(info.get('min_notional', _DEFAULT_MARKET_INFO.min_notional)),
+        )
+
+
+# 获取市场信息失败时使用的默认值（symbol按请求替换）
+_DEFAULT_MARKET_INFO = MarketInfo(
+    symbol='',
+    market_id=0,
+    price_precision=2,
+    quantity_precision=4,
+    min_quantity=0.001,
+    min_notional=10.0,
+)
 
 
 class LighterClientError(Exception):
@@ -36,6 +270,14 @@ class LighterClient:
     核心规则：1. 优先使用WebSocket获取实时数据；2. 回退到REST API；3. 自动管理精度；4. 统一错误处理
     """
     
+    # 固定属性集合：实例没有__dict__，组件和各API实例的属性读取都走槽位偏移
+    __slots__ = (
+        'config', 'logger', '_log_debug', '_log_info', '_log_warning', '_log_error',
+        'initialized', 'market_info_cache', '_symbol_locks', '_initial_book',
+        'api_client', 'ws_client', 'grpc_client', 'precision_manager', 'signer_client', 'order_batcher',
+        'account_api', 'order_api', 'transaction_api', 'candlestick_api', 'block_api', 'funding_api', 'info_api',
+    )
+    
     def __init__(self, config: Optional[LighterConfig] = None):
         """
         功能：初始化Lighter客户端
@@ -47,12 +289,21 @@ class LighterClient:
         self.config = config or get_config()
         self.logger = logging.getLogger(__name__)
         
+        # 预先绑定日志方法，行情/下单等高频路径省去每次的属性查找
+        self._log_debug = self.logger.debug
+        self._log_info = self.logger.info
+        self._log_warning = self.logger.warning
+        self._log_error = self.logger.error
+        
         # 初始化REST API客户端
         self._init_rest_clients()
         
         # 初始化WebSocket客户端
         self._init_websocket_client()
         
+        # 初始化gRPC流式客户端（配置了grpc_url时）
+        self._init_grpc_client()
+        
         # 初始化精度管理器
         self._init_precision_manager()
         
@@ -61,19 +312,37 @@ class LighterClient:
         
         # 状态跟踪
         self.initialized = False
-        self.market_info_cache: Dict[str, Dict[str, Any]] = {}
+        
+        # 市场信息缓存：symbol -> (过期时间, 市场信息)
+        self.market_info_cache: Dict[str, Tuple[float, MarketInfo]] = {}
+        
+        # 每个交易对一把锁，并发未命中时只有一个协程请求市场信息（锁无人持有时自动回收）
+        self._symbol_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        
+        # 初始化时预取的订单簿快照：(symbol, depth, 订单簿, 过期时刻monotonic)，首次get_order_book或过期后失效
+        self._initial_book: Optional[Tuple[str, int, Dict[str, Any], float]] = None
         
         self.logger.info("Lighter客户端初始化完成")
-        self.logger.debug(f"配置: {self.config.to_dict()}")
+        # 配置对象作为惰性参数，DEBUG未启用时不会生成字符串
+        self.logger.debug("配置:\n%s", self.config)
     
     def _init_rest_clients(self):
         """初始化REST API客户端"""
         try:
-            # 创建API客户端配置
-            api_config = Configuration(host=self.config.rest_url)
-            self.api_client = ApiClient(configuration=api_config)
+            # 从连接池获取API客户端（同一REST地址共享会话）
+            self.api_client = _acquire_api_client(
+                self.config.rest_url, self.config.dns_cache_ttl, self.config.connector_limit_per_host
+            )
+            
+            # 创建各API实例（SDK导入lighter包时已加载全部API模块，这里的导入不再有额外开销）
+            from lighter.api.account_api import AccountApi
+            from lighter.api.order_api import OrderApi
+            from lighter.api.transaction_api import TransactionApi
+            from lighter.api.candlestick_api import CandlestickApi
+            from lighter.api.block_api import BlockApi
+            from lighter.api.funding_api import FundingApi
+            from lighter.api.info_api import InfoApi
             
-            # 初始化各API实例
             self.account_api = AccountApi(self.api_client)
             self.order_api = OrderApi(self.api_client)
             self.transaction_api = TransactionApi(self.api_client)
@@ -93,7 +362,9 @@ class LighterClient:
         try:
             self.ws_client = LighterWebSocketClient(
                 ws_url=self.config.ws_url,
-                logger=self.logger
+                logger=self.logger,
+                transport=self.config.ws_transport,
+                ob_max_depth=self.config.ob_max_depth
             )
             self.logger.debug("WebSocket客户端初始化完成")
             
@@ -102,10 +373,36 @@ class LighterClient:
             # WebSocket客户端初始化失败不影响REST API功能
             self.ws_client = None
     
+    def _init_grpc_client(self):
+        """初始化gRPC流式客户端"""
+        self.grpc_client = None
+        if not self.config.grpc_url:
+            return
+        
+        try:
+            self.grpc_client = GrpcLighterClient(
+                grpc_url=self.config.grpc_url,
+                proto_module=self.config.grpc_proto_module,
+                logger=self.logger,
+                secure=self.config.grpc_secure,
+                ob_max_depth=self.config.ob_max_depth
+            )
+            # 流中断或结束时订单簿订阅回退到WebSocket
+            self.grpc_client.on_stream_closed = self._fallback_to_websocket
+            self.logger.debug("gRPC客户端初始化完成")
+            
+        except Exception as e:
+            self.logger.error(f"初始化gRPC客户端失败: {e}")
+            # gRPC客户端初始化失败时回退到WebSocket
+            self.grpc_client = None
+    
     def _init_precision_manager(self):
         """初始化精度管理器"""
         try:
-            self.precision_manager = PrecisionManager(self.api_client)
+            self.precision_manager = PrecisionManager(
+                self.api_client,
+                cache_ttl=self.config.market_info_ttl
+            )
             self.logger.debug("精度管理器初始化完成")
             
         except Exception as e:
@@ -116,48 +413,10 @@ class LighterClient:
     def _init_signer_client(self):
         """初始化签名客户端"""
         try:
-            # 检查是否安装了签名库
-            # 首先尝试从 lighter.signer_client 导入
-            import sys
-            import os
-            
-            # 确保 lighter-python 目录在 Python 路径中
-            lighter_python_path = '/root/myapp/simpleapp2/lighter-python'
-            if lighter_python_path not in sys.path:
-                sys.path.insert(0, lighter_python_path)
-                self.logger.debug(f"已将 lighter-python 目录添加到 Python 路径: {lighter_python_path}")
-            
-            try:
-                from lighter.signer_client import SignerClient
-                self.logger.debug("从 lighter.signer_client 导入成功")
-            except ImportError as e:
-                # 如果失败，尝试其他可能的路径
-                self.logger.debug(f"从默认路径导入失败: {e}, 尝试其他路径")
-                
-                # 尝试多种可能的路径
-                possible_paths = [
-                    '/root/myapp/simpleapp2/lighter-python',
-                    os.path.join(os.path.dirname(__file__), '..', '..', 'lighter-python'),
-                    os.path.join(os.getcwd(), 'lighter-python'),
-                    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'lighter-python'),
-                ]
-                
-                imported = False
-                for path in possible_paths:
-                    if os.path.exists(path) and os.path.isdir(path):
-                        try:
-                            if path not in sys.path:
-                                sys.path.insert(0, path)
-                            from lighter.signer_client import SignerClient
-                            imported = True
-                            self.logger.debug(f"从路径导入成功: {path}")
-                            break
-                        except ImportError:
-                            self.logger.debug(f"从路径导入失败: {path}")
-                            continue
-                
-                if not imported:
-                    raise ImportError("无法找到 lighter.signer_client 模块")
+            # 签名库的查找只在首次创建客户端时执行，之后直接复用缓存的类
+            SignerClient = _discover_signer_class()
+            if SignerClient is None:
+                raise ImportError("无法找到 lighter.signer_client 模块")
             
             # 获取API密钥字典
             api_keys_dict = self.config.get_api_keys_dict()
@@ -177,13 +436,23 @@ class LighterClient:
         except Exception as e:
             self.logger.error(f"初始化签名客户端失败: {e}")
             self.signer_client = None
+        
+        # 启用批量下单时创建批量提交器
+        self.order_batcher: Optional[OrderBatcher] = None
+        if self.signer_client and self.config.batch_orders:
+            self.order_batcher = OrderBatcher(
+                self.signer_client,
+                config=BatchConfig(interval=self.config.batch_interval),
+                logger=self.logger
+            )
+            self.logger.debug("批量下单已启用")
     
     async def initialize(self):
         """
         功能：异步初始化客户端，获取必要的初始数据
         入参：无
         返回值：bool - 初始化是否成功
-        核心规则：1. 获取市场信息；2. 测试连接；3. 预热缓存
+        核心规则：1. 获取市场信息；2. 测试连接；3. 预热缓存；4. 相互独立的步骤通过TaskGroup并发执行
         """
         if self.initialized:
             return True
@@ -191,19 +460,23 @@ class LighterClient:
         try:
             self.logger.info("开始初始化Lighter客户端...")
             
-            # 1. 测试REST API连接
-            await self._test_rest_connection()
+            # 关闭创建REST客户端时从SDK会话分离出的连接器
+            await _close_detached_connectors()
             
-            # 2. 获取市场信息
-            await self._load_market_info()
-            
-            # 3. 连接WebSocket（如果可用）
-            if self.ws_client:
-                await self._connect_websocket()
-            
-            # 4. 验证签名客户端（如果可用）
-            if self.signer_client:
-                await self._verify_signer_client()
+            # 各初始化步骤相互独立，并发执行：
+            # 1. 测试REST API连接；2. 获取市场信息并预取订单簿快照；3. 连接gRPC/WebSocket；4. 验证签名客户端；
+            # 5. 在线程中预热NumPy订单簿的JIT内核，避免首条更新承担编译开销（使用C扩展订单簿时无需预热）
+            async with asyncio.TaskGroup() as tg:
+                if (self.grpc_client or self.ws_client) and not C_ORDER_BOOK_AVAILABLE:
+                    tg.create_task(asyncio.to_thread(_warmup_order_book_kernels))
+                tg.create_task(self._test_rest_connection())
+                tg.create_task(self._load_market_info_and_book())
+                if self.grpc_client:
+                    tg.create_task(self._connect_grpc())
+                if self.ws_client:
+                    tg.create_task(self._connect_websocket())
+                if self.signer_client:
+                    tg.create_task(self._verify_signer_client())
             
             self.initialized = True
             self.logger.info("Lighter客户端初始化成功")
@@ -245,22 +518,79 @@ class LighterClient:
             if self.precision_manager:
                 # 获取配置中指定的交易对信息
                 market_info = await self.precision_manager.get_market_info(self.config.symbol)
-                self.market_info_cache[self.config.symbol] = market_info
+                if market_info.get('is_default'):
+                    raise LighterClientError("精度管理器未能获取市场信息，返回的是默认精度")
+                self._cache_market_info(self.config.symbol, MarketInfo.from_dict(market_info))
                 self.logger.info(f"加载市场信息成功: {self.config.symbol}")
             else:
                 self.logger.warning("精度管理器不可用，跳过市场信息加载")
                 
         except Exception as e:
             self.logger.error(f"加载市场信息失败: {e}")
-            # 使用默认市场信息
-            self.market_info_cache[self.config.symbol] = {
-                'symbol': self.config.symbol,
-                'market_id': 0,
-                'price_precision': 2,
-                'quantity_precision': 4,
-                'min_quantity': 0.001,
-                'min_notional': 10.0,
-            }
+            # 使用默认市场信息（只短时间缓存，之后重新请求）
+            self._cache_default_market_info(self.config.symbol)
+    
+    async def _load_market_info_and_book(self):
+        """
+        功能：加载市场信息并预取初始订单簿快照
+        入参：无
+        返回值：无
+        核心规则：订单簿依赖market_id，在市场信息之后获取；快照失败不影响初始化
+        """
+        await self._load_market_info()
+        
+        try:
+            market_info = await self.get_market_info(self.config.symbol)
+            order_book = await self._fetch_rest_order_book(
+                self.config.symbol, market_info.market_id, INITIAL_BOOK_DEPTH
+            )
+            self._initial_book = (
+                self.config.symbol, INITIAL_BOOK_DEPTH, order_book, time.monotonic() + INITIAL_BOOK_TTL
+            )
+            self.logger.debug(f"预取订单簿快照成功: {self.config.symbol}")
+        except Exception as e:
+            self.logger.warning(f"预取订单簿快照失败: {e}")
+    
+    def _cache_market_info(self, symbol: str, market_info: MarketInfo):
+        """缓存市场信息，有效期由config.market_info_ttl决定"""
+        self.market_info_cache[symbol] = (time.monotonic() + self.config.market_info_ttl, market_info)
+    
+    def _cache_default_market_info(self, symbol: str) -> MarketInfo:
+        """获取失败时缓存默认市场信息，有效期MARKET_INFO_NEGATIVE_TTL，返回该默认值"""
+        market_info = replace(_DEFAULT_MARKET_INFO, symbol=symbol)
+        self.market_info_cache[symbol] = (time.monotonic() + MARKET_INFO_NEGATIVE_TTL, market_info)
+        return market_info
+    
+    async def _connect_grpc(self):
+        """连接gRPC，失败时订单簿订阅回退到WebSocket（connect失败时已自行关闭通道）"""
+        try:
+            connected = await self.grpc_client.connect()
+            if connected:
+                self.logger.info("gRPC连接成功，订单簿将通过gRPC流式订阅")
+            else:
+                self.logger.warning("gRPC连接失败，订单簿将使用WebSocket")
+                self.grpc_client = None
+                
+        except Exception as e:
+            self.logger.error(f"gRPC连接异常: {e}")
+            self.grpc_client = None
+    
+    async def _fallback_to_websocket(self, market_id: str, callbacks: List[Callable], top_n: int = 0):
+        """
+        功能：gRPC订单簿流中断后改用WebSocket订阅同一市场
+        入参：market_id - 市场ID；callbacks - 原gRPC订阅的回调列表；top_n - 原订阅的深度（0表示全部）
+        返回值：无
+        核心规则：1. 逐个回调以原订阅深度重新订阅WebSocket order_book频道；2. WebSocket不可用时记录错误
+        """
+        if not self.ws_client:
+            self._log_error(f"gRPC订单簿流中断且WebSocket客户端不可用: market_id={market_id}")
+            return
+        
+        self._log_warning(f"gRPC订单簿流中断，改用WebSocket订阅: market_id={market_id}")
+        for callback in callbacks:
+            if not await self.ws_client.subscribe('order_book', market_id, callback, top_n):
+                self._log_error(f"WebSocket回退订阅失败: market_id={market_id}")
+                return
     
     async def _connect_websocket(self):
         """连接WebSocket"""
@@ -275,9 +605,9 @@ class LighterClient:
             self.logger.error(f"WebSocket连接异常: {e}")
     
     async def _verify_signer_client(self):
-        """验证签名客户端"""
+        """验证签名客户端（check_client是阻塞的原生调用，内部会请求交易所校验API密钥，放到线程中执行以免阻塞事件循环）"""
         try:
-            error = self.signer_client.check_client()
+            error = await asyncio.to_thread(self.signer_client.check_client)
             if error:
                 self.logger.warning(f"签名客户端验证失败: {error}")
             else:
@@ -288,37 +618,47 @@ class LighterClient:
     
     # ========== 公共方法 ==========
     
-    async def get_market_info(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+    async def get_market_info(self, symbol: Optional[str] = None) -> MarketInfo:
         """
         功能：获取交易对的市场信息
         入参：symbol - 交易对符号（可选，默认使用配置中的符号）
-        返回值：Dict[str, Any] - 市场信息字典
-        核心规则：1. 检查缓存；2. 从精度管理器获取；3. 回退到默认值
+        返回值：MarketInfo - 市场信息
+        核心规则：1. 检查TTL缓存；2. 未命中时按交易对加锁，同一交易对只发起一次请求；
+                  3. 过期后经精度管理器重新验证（支持304）；4. 失败时（包括精度管理器返回is_default标记的默认精度）
+                  回退到默认值，并只在MARKET_INFO_NEGATIVE_TTL内缓存默认值
         """
-        symbol = symbol or self.config.symbol
+        symbol = sys.intern(symbol or self.config.symbol)
         
         # 检查缓存
-        if symbol in self.market_info_cache:
-            return self.market_info_cache[symbol]
+        cached = self.market_info_cache.get(symbol)
+        if cached and time.monotonic() < cached[0]:
+            return cached[1]
         
-        # 从精度管理器获取
-        if self.precision_manager:
-            try:
-                market_info = await self.precision_manager.get_market_info(symbol)
-                self.market_info_cache[symbol] = market_info
-                return market_info
-            except Exception as e:
-                self.logger.error(f"获取市场信息失败: {symbol}, 错误: {e}")
+        lock = self._symbol_locks.get(symbol)
+        if lock is None:
+            lock = self._symbol_locks[symbol] = asyncio.Lock()
         
-        # 返回默认值
-        return {
-            'symbol': symbol,
-            'market_id': 0,
-            'price_precision': 2,
-            'quantity_precision': 4,
-            'min_quantity': 0.001,
-            'min_notional': 10.0,
-        }
+        async with lock:
+            # 等锁期间其他协程可能已经刷新了缓存
+            cached = self.market_info_cache.get(symbol)
+            if cached and time.monotonic() < cached[0]:
+                return cached[1]
+            
+            # 从精度管理器获取（缓存过期时强制重新验证）
+            if self.precision_manager:
+                try:
+                    info = await self.precision_manager.get_market_info(symbol, refresh=cached is not None)
+                    if info.get('is_default'):
+                        self._log_warning(f"获取市场信息失败: {symbol}, 精度管理器返回的是默认精度")
+                    else:
+                        market_info = MarketInfo.from_dict(info)
+                        self._cache_market_info(symbol, market_info)
+                        return market_info
+                except Exception as e:
+                    self._log_error(f"获取市场信息失败: {symbol}, 错误: {e}")
+            
+            # 返回默认值
+            return self._cache_default_market_info(symbol)
     
     async def get_account_balance(self) -> Dict[str, Any]:
         """
@@ -347,78 +687,110 @@ class LighterClient:
                         'total': float(asset_info.balance) + float(asset_info.locked_balance)
                     }
             
-            self.logger.info(f"获取账户余额成功: {len(balances)} 个资产")
+            self._log_info(f"获取账户余额成功: {len(balances)} 个资产")
             return balances
             
         except Exception as e:
-            self.logger.error(f"获取账户余额失败: {e}")
+            self._log_error(f"获取账户余额失败: {e}")
             raise LighterClientError(f"获取账户余额失败: {e}")
     
-    async def get_order_book(self, symbol: Optional[str] = None, depth: int = 10) -> Dict[str, Any]:
+    async def get_order_book(self, symbol: Optional[str] = None, depth: int = 10,
+                             use_snapshot: bool = True) -> Dict[str, Any]:
         """
         功能：获取订单簿
-        入参：symbol - 交易对符号；depth - 深度
+        入参：symbol - 交易对符号；depth - 深度；use_snapshot - 是否允许使用初始化时预取的快照
         返回值：Dict[str, Any] - 订单簿信息
-        核心规则：1. 优先使用WebSocket实时数据；2. 回退到REST API
+        核心规则：1. 优先使用gRPC流（仍在运行时）或WebSocket维护的本地订单簿；
+                  2. 其次使用初始化时预取的快照（只使用一次，且只在INITIAL_BOOK_TTL内有效）；3. 回退到REST API
         """
-        symbol = symbol or self.config.symbol
+        symbol = sys.intern(symbol or self.config.symbol)
         
         # 获取市场信息以确定market_id
         market_info = await self.get_market_info(symbol)
-        market_id = market_info.get('market_id', 0)
+        market_id = market_info.market_id
         
-        try:
-            # 使用REST API获取订单簿
-            order_book = await self.order_api.order_book_orders(
-                market_id=market_id,
-                limit=depth
-            )
-            
-            # 解析订单簿
-            result = {
+        # 已订阅订单簿时直接从本地订单簿按需转换
+        book = None
+        if self.grpc_client and self.grpc_client.is_stream_live(str(market_id)):
+            book = self.grpc_client.get_local_order_book(str(market_id))
+        if book is None and self.ws_client and self.ws_client.is_connected():
+            book = self.ws_client.get_local_order_book(str(market_id))
+        if book is not None:
+            result = book.to_dict(depth)
+            result.update({
                 'symbol': symbol,
                 'market_id': market_id,
-                'asks': [],
-                'bids': [],
-                'timestamp': getattr(order_book, 'timestamp', None)
-            }
-            
-            if hasattr(order_book, 'asks'):
-                for ask in order_book.asks:
-                    result['asks'].append({
-                        'price': float(ask.price) if hasattr(ask, 'price') else 0,
-                        'quantity': float(ask.size) if hasattr(ask, 'size') else 0
-                    })
-            
-            if hasattr(order_book, 'bids'):
-                for bid in order_book.bids:
-                    result['bids'].append({
-                        'price': float(bid.price) if hasattr(bid, 'price') else 0,
-                        'quantity': float(bid.size) if hasattr(bid, 'size') else 0
-                    })
-            
+                'timestamp': None,
+            })
             return result
-            
+        
+        # 初始化时预取的快照只使用一次且只在有效期内使用，之后的请求走REST获取最新数据
+        if self._initial_book is not None and use_snapshot:
+            initial_symbol, initial_depth, initial_result, expires = self._initial_book
+            self._initial_book = None
+            if initial_symbol == symbol and depth <= initial_depth and time.monotonic() < expires:
+                result = dict(initial_result)
+                result['asks'] = initial_result['asks'][:depth]
+                result['bids'] = initial_result['bids'][:depth]
+                return result
+        
+        try:
+            return await self._fetch_rest_order_book(symbol, market_id, depth)
         except Exception as e:
-            self.logger.error(f"获取订单簿失败: {symbol}, 错误: {e}")
+            self._log_error(f"获取订单簿失败: {symbol}, 错误: {e}")
             raise LighterClientError(f"获取订单簿失败: {e}")
     
-    async def subscribe_order_book(self, symbol: str, callback: Callable):
+    async def _fetch_rest_order_book(self, symbol: str, market_id: int, depth: int) -> Dict[str, Any]:
+        """
+        功能：通过REST API获取订单簿
+        入参：symbol - 交易对符号；market_id - 市场ID；depth - 深度
+        返回值：Dict[str, Any] - 订单簿信息
+        核心规则：1. 用attrgetter批量取出每档价格和数量；2. 解析失败时抛出原始异常，由调用方处理
+        """
+        order_book = await self.order_api.order_book_orders(
+            market_id=market_id,
+            limit=depth
+        )
+        
+        # 解析订单簿
+        result = {
+            'symbol': symbol,
+            'market_id': market_id,
+            'asks': [],
+            'bids': [],
+            'timestamp': getattr(order_book, 'timestamp', None)
+        }
+        
+        # SimpleOrder的剩余数量字段为remaining_base_amount；字段缺失时直接抛出AttributeError而不是静默填0
+        get_level = _LEVEL_GETTER
+        result['asks'] = [{'price': float(p), 'quantity': float(q)} for p, q in map(get_level, order_book.asks or ())]
+        result['bids'] = [{'price': float(p), 'quantity': float(q)} for p, q in map(get_level, order_book.bids or ())]
+        
+        return result
+    
+    async def subscribe_order_book(self, symbol: str, callback: Callable, top_n: int = 0):
         """
         功能：订阅订单簿实时数据
-        入参：symbol - 交易对符号；callback - 回调函数
+        入参：symbol - 交易对符号；callback - 回调函数；top_n - 回调只需要的前N档（0表示全部）
         返回值：bool - 订阅是否成功
-        核心规则：1. 使用WebSocket订阅；2. 需要WebSocket客户端可用
+        核心规则：1. 优先使用gRPC流式订阅；2. gRPC未连接或该市场的流曾中断时使用WebSocket订阅；3. 回调数据格式一致
         """
-        if not self.ws_client:
-            self.logger.error("WebSocket客户端不可用，无法订阅")
+        if not self.grpc_client and not self.ws_client:
+            self._log_error("WebSocket客户端不可用，无法订阅")
             return False
         
         # 获取market_id
         market_info = await self.get_market_info(symbol)
-        market_id = market_info.get('market_id', 0)
+        market_id = market_info.market_id
+        
+        if (self.grpc_client and self.grpc_client.is_connected()
+                and not self.grpc_client.is_stream_failed(str(market_id))):
+            return await self.grpc_client.subscribe_order_book(str(market_id), callback, top_n)
         
-        return await self.ws_client.subscribe('order_book', str(market_id), callback)
+        if not self.ws_client:
+            self._log_error("WebSocket客户端不可用，无法订阅")
+            return False
+        return await self.ws_client.subscribe('order_book', str(market_id), callback, top_n)
     
     async def subscribe_account(self, callback: Callable):
         """
@@ -428,7 +800,7 @@ class LighterClient:
         核心规则：1. 使用WebSocket订阅；2. 需要WebSocket客户端可用
         """
         if not self.ws_client:
-            self.logger.error("WebSocket客户端不可用，无法订阅")
+            self._log_error("WebSocket客户端不可用，无法订阅")
             return False
         
         return await self.ws_client.subscribe('account_all', str(self.config.account_index), callback)
@@ -441,26 +813,32 @@ class LighterClient:
         核心规则：1. 使用WebSocket订阅；2. 需要WebSocket客户端可用
         """
         if not self.ws_client:
-            self.logger.error("WebSocket客户端不可用，无法订阅")
+            self._log_error("WebSocket客户端不可用，无法订阅")
             return False
         
-        return await self.ws_client.subscribe('ticker', symbol, callback)
+        return await self.ws_client.subscribe('ticker', sys.intern(symbol), callback)
     
     # ========== 交易方法（需要签名客户端） ==========
     
     async def create_order(self, symbol: str, side: str, order_type: str, 
                           quantity: float, price: Optional[float] = None, 
-                          **kwargs) -> Dict[str, Any]:
+                          **kwargs) -> Union[Dict[str, Any], OrderHandle]:
         """
         功能：创建订单
         入参：symbol - 交易对；side - 买卖方向；order_type - 订单类型；
-              quantity - 数量；price - 价格（限价单需要）
-        返回值：Dict[str, Any] - 订单创建结果
-        核心规则：1. 需要签名客户端；2. 自动精度转换；3. 参数验证
+              quantity - 数量；price - 价格（限价单需要；市价单为最差可接受成交价，可选）；
+              kwargs - max_slippage（市价单未指定价格时的最大滑点）、time_in_force、reduce_only、
+                       order_expiry（未指定时市价单/IOC订单使用DEFAULT_IOC_EXPIRY）
+        返回值：Dict[str, Any] - 订单创建结果；启用批量下单时返回OrderHandle
+        核心规则：1. 需要签名客户端；2. 自动精度转换；3. 参数验证；4. 批量模式下合并提交；
+                  5. 市价单未指定价格时按对手方最优价加滑点推导最差可接受成交价
         """
         if not self.signer_client:
             raise LighterClientError("签名客户端不可用，无法创建订单")
         
+        # 交易对作为各级缓存的键，驻留后字典查找可走指针比较
+        symbol = sys.intern(symbol)
+        
         # 参数验证
         if side.lower() not in ['buy', 'sell']:
             raise LighterClientError(f"无效的交易方向: {side}")
@@ -470,7 +848,15 @@ class LighterClient:
         
         # 获取市场信息
         market_info = await self.get_market_info(symbol)
-        market_id = market_info.get('market_id', 0)
+        market_id = market_info.market_id
+        
+        # 转换为交易所参数
+        is_ask = (side.lower() == 'sell')
+        
+        if order_type.lower() == 'market' and price is None:
+            price = await self._market_order_price(
+                symbol, is_ask, kwargs.get('max_slippage', MARKET_ORDER_MAX_SLIPPAGE)
+            )
         
         # 精度转换
         if self.precision_manager:
@@ -480,12 +866,36 @@ class LighterClient:
             if price is not None:
                 price = self.precision_manager.adjust_to_tick_size(price, symbol)
         
-        # 转换为交易所参数
-        is_ask = (side.lower() == 'sell')
+        # 批量模式：整数化价格和数量后交给批量提交器
+        if self.order_batcher:
+            if order_type.lower() == 'limit' and price is None:
+                raise LighterClientError("限价单需要指定价格")
+            
+            signer = self.signer_client
+            base_amount = round(quantity * 10 ** market_info.quantity_precision)
+            price_int = round(price * 10 ** market_info.price_precision)
+            
+            if order_type.lower() == 'limit':
+                order_type_code = signer.ORDER_TYPE_LIMIT
+                time_in_force = kwargs.get('time_in_force', signer.ORDER_TIME_IN_FORCE_GOOD_TILL_TIME)
+            else:
+                order_type_code = signer.ORDER_TYPE_MARKET
+                time_in_force = signer.ORDER_TIME_IN_FORCE_IMMEDIATE_OR_CANCEL
+            
+            return await self.order_batcher.submit(
+                market_index=market_id,
+                base_amount=base_amount,
+                price=price_int,
+                is_ask=is_ask,
+                order_type=order_type_code,
+                time_in_force=time_in_force,
+                reduce_only=kwargs.get('reduce_only', False),
+                order_expiry=kwargs.get('order_expiry'),
+            )
         
         # 这里需要根据实际API调整
         # 简化实现，实际使用时需要根据SignerClient的API调整
-        self.logger.warning("创建订单功能需要根据实际SignerClient API实现")
+        self._log_warning("创建订单功能需要根据实际SignerClient API实现")
         
         return {
             'status': 'not_implemented',
@@ -498,6 +908,23 @@ class LighterClient:
             'market_id': market_id
         }
     
+    async def _market_order_price(self, symbol: str, is_ask: bool, max_slippage: float) -> float:
+        """
+        功能：推导市价单的最差可接受成交价
+        入参：symbol - 交易对；is_ask - 是否卖出；max_slippage - 最大滑点（如0.01表示1%）
+        返回值：float - 最差可接受成交价
+        核心规则：1. 卖单以最优买价为基准向下、买单以最优卖价为基准向上偏移max_slippage；
+                  2. 对手方没有挂单时报错，不以0价格下单
+        """
+        # 定价必须基于最新数据，不使用初始化时预取的快照
+        order_book = await self.get_order_book(symbol, depth=1, use_snapshot=False)
+        levels = order_book.get('bids' if is_ask else 'asks')
+        if not levels:
+            raise LighterClientError(f"{symbol}对手方订单簿为空，无法确定市价单可接受价格")
+        
+        ideal_price = float(levels[0]['price'])
+        return ideal_price * (1 + max_slippage * (-1 if is_ask else 1))
+    
     async def close(self):
         """
         功能：关闭客户端，释放资源
@@ -511,9 +938,23 @@ class LighterClient:
         if self.ws_client:
             await self.ws_client.disconnect()
         
-        # 关闭API客户端
+        # 关闭gRPC连接
+        if self.grpc_client:
+            await self.grpc_client.close()
+        
+        # 取消精度管理器进行中的请求
+        if self.precision_manager:
+            await self.precision_manager.aclose()
+        
+        # 归还API客户端（最后一个使用者负责关闭会话）
         if self.api_client:
-            await self.api_client.close()
+            await _release_api_client(self.config.rest_url)
+            self.api_client = None
+        await _close_detached_connectors()
+        
+        # 提交剩余的批量订单
+        if self.order_batcher:
+            await self.order_batcher.close()
         
         # 关闭签名客户端
         if self.signer_client:
@@ -528,6 +969,7 @@ class LighterClient:
             'initialized': self.initialized,
             'rest_api': 'available',
             'websocket': 'available' if self.ws_client else 'unavailable',
+            'grpc': 'available' if self.grpc_client else 'unavailable',
             'precision_manager': 'available' if self.precision_manager else 'unavailable',
             'signer_client': 'available' if self.signer_client else 'unavailable',
             'market_info_cached': len(self.market_info_cache),
@@ -0,0 +1,219 @@
+"""
+文件名：local_order_book.py
+用途：本地订单簿维护，应用WebSocket快照和增量
+依赖：numpy, _ob_kernels, itertools, order_book（可选）, fastnumbers（可选）
+核心功能：1. 快照重建；2. 增量合并；3. 按需转换为字典列表；4. 优先使用C扩展订单簿
+"""
+
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+
+try:
+    # order_book为可选依赖：C实现的有序映射，插入/删除O(log n)
+    from order_book import OrderBook as _COrderBook
+    C_ORDER_BOOK_AVAILABLE = True
+except ImportError:
+    _COrderBook = None
+    C_ORDER_BOOK_AVAILABLE = False
+
+try:
+    # fastnumbers为可选依赖：基于fast_float的字符串转浮点，与内置float语义一致（非法输入抛ValueError）
+    from fastnumbers import float as _to_float
+    FASTNUMBERS_AVAILABLE = True
+except ImportError:
+    _to_float = float
+    FASTNUMBERS_AVAILABLE = False
+
+
+_EMPTY = np.empty(0, dtype=np.float64)
+
+
+def levels_to_arrays(levels: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    功能：将WebSocket推送的档位列表解析为价格、数量两个并行数组
+    入参：levels - 档位列表（每项包含price和size字段）
+    返回值：(prices, quantities) - np.float64数组
+    核心规则：1. 使用np.fromiter直接填充预分配数组，避免中间列表；2. 已安装fastnumbers时用其解析字符串
+    """
+    count = len(levels)
+    prices = np.fromiter((_to_float(level['price']) for level in levels), dtype=np.float64, count=count)
+    quantities = np.fromiter((_to_float(level['size']) for level in levels), dtype=np.float64, count=count)
+    return prices, quantities
+
+
+class LocalOrderBook:
+    """
+    功能：单个市场的本地订单簿（NumPy并行数组实现）
+    入参：market_id - 市场ID；max_depth - 每侧保留的最大档位数（0表示不限制）
+    返回值：本地订单簿实例
+    核心规则：1. 卖单价格升序、买单价格降序，下标0即最优价；2. 数量为0的档位被删除
+    """
+
+    def __init__(self, market_id: str, max_depth: int = 0):
+        """
+        功能：初始化空订单簿
+        入参：market_id - 市场ID；max_depth - 每侧保留的最大档位数（0表示不限制）
+        返回值：无
+        核心规则：1. 四个并行数组初始为空；2. 合并内核在此延迟导入，使用C扩展订单簿时不加载numba
+        """
+        from ._ob_kernels import merge_side
+
+        self._merge_side = merge_side
+        self.market_id = market_id
+        self.max_depth = max_depth
+        self.ask_prices = _EMPTY
+        self.ask_quantities = _EMPTY
+        self.bid_prices = _EMPTY
+        self.bid_quantities = _EMPTY
+        self.update_count = 0
+
+    def reset(self, asks: List[Dict[str, Any]], bids: List[Dict[str, Any]]):
+        """使用快照重建订单簿"""
+        self.ask_prices = self.ask_quantities = _EMPTY
+        self.bid_prices = self.bid_quantities = _EMPTY
+        self.apply(asks, bids)
+
+    def apply(self, asks: List[Dict[str, Any]], bids: List[Dict[str, Any]]):
+        """
+        功能：应用一次增量更新
+        入参：asks - 卖单增量档位；bids - 买单增量档位
+        返回值：无
+        核心规则：1. 每侧一次JIT内核调用完成插入、更新和删除；2. 超出max_depth的档位被截断
+        """
+        depth = self.max_depth or None
+
+        if asks:
+            upd_prices, upd_quantities = levels_to_arrays(asks)
+            prices, quantities = self._merge_side(
+                self.ask_prices, self.ask_quantities, upd_prices, upd_quantities, True
+            )
+            self.ask_prices, self.ask_quantities = prices[:depth], quantities[:depth]
+
+        if bids:
+            upd_prices, upd_quantities = levels_to_arrays(bids)
+            prices, quantities = self._merge_side(
+                self.bid_prices, self.bid_quantities, upd_prices, upd_quantities, False
+            )
+            self.bid_prices, self.bid_quantities = prices[:depth], quantities[:depth]
+
+        self.update_count += 1
+
+    @property
+    def ask_count(self) -> int:
+        """卖单档位数"""
+        return self.ask_prices.size
+
+    @property
+    def bid_count(self) -> int:
+        """买单档位数"""
+        return self.bid_prices.size
+
+    def to_dict(self, depth: Optional[int] = None) -> Dict[str, List[Dict[str, float]]]:
+        """
+        功能：将订单簿转换为字典列表格式（与REST接口返回格式一致）
+        入参：depth - 每侧返回的档位数（可选，默认全部）
+        返回值：Dict - 包含asks和bids的字典
+        核心规则：仅在调用方需要时才构造Python对象
+        """
+        return {
+            'asks': [
+                {'price': price, 'quantity': quantity}
+                for price, quantity in zip(self.ask_prices[:depth].tolist(), self.ask_quantities[:depth].tolist())
+            ],
+            'bids': [
+                {'price': price, 'quantity': quantity}
+                for price, quantity in zip(self.bid_prices[:depth].tolist(), self.bid_quantities[:depth].tolist())
+            ],
+        }
+
+
+class CLocalOrderBook:
+    """
+    功能：单个市场的本地订单簿（order_book C扩展实现）
+    入参：market_id - 市场ID；max_depth - 每侧保留的最大档位数（0表示不限制）
+    返回值：本地订单簿实例
+    核心规则：1. 买卖两侧为C实现的有序映射，逐档插入/删除；2. 接口与LocalOrderBook一致
+    """
+
+    def __init__(self, market_id: str, max_depth: int = 0):
+        """
+        功能：初始化空订单簿
+        入参：market_id - 市场ID；max_depth - 每侧保留的最大档位数（0表示不限制）
+        返回值：无
+        核心规则：价格以float为键（C扩展要求数值键，字符串键会按字典序排序）
+        """
+        self.market_id = market_id
+        self.max_depth = max_depth
+        self._ob = _COrderBook(max_depth=max_depth)
+        self.update_count = 0
+
+    def reset(self, asks: List[Dict[str, Any]], bids: List[Dict[str, Any]]):
+        """使用快照重建订单簿"""
+        self._ob = _COrderBook(max_depth=self.max_depth)
+        self.apply(asks, bids)
+
+    def apply(self, asks: List[Dict[str, Any]], bids: List[Dict[str, Any]]):
+        """
+        功能：应用一次增量更新
+        入参：asks - 卖单增量档位；bids - 买单增量档位
+        返回值：无
+        核心规则：数量为0时删除价位，否则插入或覆盖
+        """
+        self._apply_side(self._ob.asks, asks)
+        self._apply_side(self._ob.bids, bids)
+        self.update_count += 1
+
+    @staticmethod
+    def _apply_side(side: Any, levels: List[Dict[str, Any]]):
+        """将增量档位写入单侧有序映射"""
+        for level in levels:
+            price = _to_float(level['price'])
+            size = _to_float(level['size'])
+            if size > 0:
+                side[price] = size
+            else:
+                try:
+                    del side[price]
+                except KeyError:
+                    pass
+
+    @property
+    def ask_count(self) -> int:
+        """卖单档位数"""
+        return len(self._ob.asks)
+
+    @property
+    def bid_count(self) -> int:
+        """买单档位数"""
+        return len(self._ob.bids)
+
+    def to_dict(self, depth: Optional[int] = None) -> Dict[str, List[Dict[str, float]]]:
+        """
+        功能：将订单簿转换为字典列表格式（与REST接口返回格式一致）
+        入参：depth - 每侧返回的档位数（可选，默认全部）
+        返回值：Dict - 包含asks和bids的字典
+        核心规则：C扩展按价格有序导出，仅截取所需档位
+        """
+        return {
+            'asks': [
+                {'price': price, 'quantity': quantity}
+                for price, quantity in islice(self._ob.asks.to_dict().items(), depth)
+            ],
+            'bids': [
+                {'price': price, 'quantity': quantity}
+                for price, quantity in islice(self._ob.bids.to_dict().items(), depth)
+            ],
+        }
+
+
+def create_order_book(market_id: str, max_depth: int = 0) -> Union[CLocalOrderBook, LocalOrderBook]:
+    """
+    功能：创建本地订单簿
+    入参：market_id - 市场ID；max_depth - 每侧保留的最大档位数（0表示不限制）
+    返回值：已安装order_book时返回CLocalOrderBook，否则返回LocalOrderBook
+    核心规则：优先使用C扩展实现，NumPy/Numba实现作为回退
+    """
+    if C_ORDER_BOOK_AVAILABLE:
+        return CLocalOrderBook(market_id, max_depth)
+    return LocalOrderBook(market_id, max_depth)
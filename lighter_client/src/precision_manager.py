@@ -1,15 +1,23 @@
 """
 文件名：precision_manager.py
 用途：代币交易精度管理，从交易所获取精度并自动转换
-依赖：lighter, asyncio, logging, typing
-核心功能：1. 从交易所API获取市场信息；2. 解析精度数据；3. 提供精度转换方法
+依赖：lighter, asyncio, decimal, functools, logging, math, operator, sys, time, types, typing
+核心功能：1. 从交易所API获取市场信息；2. 解析精度数据；3. 提供精度转换方法；4. 市场列表TTL/ETag缓存
 """
 
 import asyncio
+import functools
 import logging
-from typing import Dict, Optional, Tuple, Any
+import math
+import operator
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from types import MappingProxyType
+from typing import Callable, Dict, Optional, Tuple, Any
 from lighter.api_client import ApiClient
 from lighter.api.order_api import OrderApi
+from lighter.exceptions import ApiException
 
 
 class PrecisionManagerError(Exception):
@@ -17,24 +25,181 @@ class PrecisionManagerError(Exception):
     pass
 
 
+# 常见交易对的默认精度：symbol -> (价格精度, 数量精度)，API失败时使用
+_DEFAULT_PRECISIONS = MappingProxyType({
+    'BTC-USDT': (2, 6),
+    'ETH-USDT': (2, 4),
+    'SOL-USDT': (3, 2),
+})
+
+# 默认市场信息中与交易对无关的字段（is_default标记该结果不是交易所返回的数据，调用方不应当作成功结果缓存）
+_DEFAULT_MARKET_INFO_TEMPLATE = MappingProxyType({
+    'market_id': 0,
+    'min_quantity': 0.001,
+    'min_notional': 10.0,
+    'is_default': True,
+})
+
+# 订单簿对象的字段及缺失时的默认值（顺序与_parse_market_info的解包一致）
+_MARKET_ATTR_DEFAULTS = (
+    ('symbol', 'UNKNOWN'),
+    ('market_id', 0),
+    ('market_type', 'perp'),
+    ('base_asset_id', 0),
+    ('quote_asset_id', 0),
+    ('status', 'unknown'),
+    ('taker_fee', '0.0000'),
+    ('maker_fee', '0.0000'),
+    ('min_base_amount', '0.001'),
+    ('min_quote_amount', '10.0'),
+    ('supported_size_decimals', 4),
+    ('supported_price_decimals', 2),
+)
+_MARKET_ATTRS = operator.attrgetter(*(name for name, _ in _MARKET_ATTR_DEFAULTS))
+
+# 未找到的交易对的负缓存有效期（秒），期间重复查询直接返回默认精度
+UNKNOWN_SYMBOL_TTL = 60.0
+
+# 价格格式化走整数拼接路径的最大精度（更高精度时缩放后的整数可能超出float精确表示范围）
+_INT_FORMAT_MAX_PRECISION = 8
+
+# 缩放后的整数超过15位有效数字时，float格式化无法保证十进制结果精确
+_FLOAT_EXACT_INT_LIMIT = 10 ** 15
+
+# 生成函数的精度校验样本（与Decimal路径结果不一致时放弃生成函数）
+_PRICE_FN_PROBES = (0.0, 1.0, 0.1, 0.3, 2.675, 1.005, 3002.755, 1234.56789, 98765.4321, 0.000123456)
+
+# 生成的舍入函数模板：常规情况只有一次乘加和floor；缩放后落在.5附近（十进制进位点）时按Decimal精确舍入
+_PRICE_FN_TEMPLATE = """
+def adjust(x):
+    t = x * {scale} + 0.5
+    r = floor(t)
+    d = t - r
+    margin = (abs(t) + 1.0) * 1e-12
+    if d < margin or d > 1.0 - margin:
+        return float(Decimal(repr(x)).quantize(QUANTIZER, rounding=ROUND_HALF_UP))
+    return r / {scale}
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_price_fn(precision: int) -> Optional[Callable[[float], float]]:
+    """
+    功能：为指定价格精度生成舍入函数
+    入参：precision - 价格精度（小数位数）
+    返回值：Optional[Callable] - 舍入函数；精度超出浮点可表示范围或校验失败时返回None
+    核心规则：1. 缩放系数作为常量内联进函数体，绕过Decimal上下文；2. 进位点附近回退到Decimal，
+              结果与回退路径一致（四舍五入）；3. 以样本校验生成函数；4. 相同精度的交易对共享函数
+    """
+    if not 0 <= precision <= 15:
+        return None
+    
+    quantizer = Decimal(10) ** -precision
+    namespace: Dict[str, Any] = {
+        'floor': math.floor,
+        'Decimal': Decimal,
+        'QUANTIZER': quantizer,
+        'ROUND_HALF_UP': ROUND_HALF_UP,
+    }
+    exec(_PRICE_FN_TEMPLATE.format(scale=10 ** precision), namespace)
+    adjust = namespace['adjust']
+    
+    for probe in _PRICE_FN_PROBES:
+        if adjust(probe) != float(Decimal(str(probe)).quantize(quantizer, rounding=ROUND_HALF_UP)):
+            return None
+    return adjust
+
+
+@functools.lru_cache(maxsize=256)
+def _extract_precision(tick_size: str) -> int:
+    """
+    功能：从tick_size字符串中提取精度（小数位数）
+    入参：tick_size - tick大小字符串（如"0.01"）
+    返回值：int - 精度（小数点后忽略末尾0的位数）
+    核心规则：纯函数，不同的tick_size字符串只有少数几种，所有实例共享结果缓存
+    """
+    dot = tick_size.find('.')
+    if dot < 0:
+        return 0
+    
+    # 末尾没有0时rstrip直接返回原对象，不产生中间字符串
+    return len(tick_size.rstrip('0')) - dot - 1
+
+
+def _strip_zeros(formatted: str) -> str:
+    """去掉定点格式字符串小数部分末尾的0"""
+    return formatted.rstrip('0').rstrip('.') if '.' in formatted else formatted
+
+
+@functools.lru_cache(maxsize=8192)
+def _format_fixed_str(value: float, precision: int) -> str:
+    """
+    功能：按精度四舍五入并格式化价格或数量
+    入参：value - 原始价格/数量；precision - 精度（小数位数）
+    返回值：str - 去掉末尾0的字符串
+    核心规则：1. 结果只取决于(数值, 精度)，相同精度的交易对共享缓存，精度变化无需清空；
+              2. 常见精度走整数拼接；3. 无生成函数或超出15位有效数字时走Decimal路径；4. 结果与Decimal四舍五入一致
+    """
+    adjust = _compile_price_fn(precision)
+    factor = 10 ** precision
+    if adjust is None or (precision > _INT_FORMAT_MAX_PRECISION and abs(value) * factor >= _FLOAT_EXACT_INT_LIMIT):
+        # 缩放后超出15位有效数字时，浮点格式化会带出二进制误差，改走Decimal路径
+        quantizer = Decimal(10) ** -precision
+        return _strip_zeros(f"{Decimal(str(value)).quantize(quantizer, rounding=ROUND_HALF_UP):f}")
+    
+    if precision > _INT_FORMAT_MAX_PRECISION:
+        return _strip_zeros(f"{adjust(value):.{precision}f}")
+    
+    # 常见精度走整数拼接：舍入后的数值还原成整数，divmod拆成整数/小数部分，不经过浮点格式化
+    scaled = round(adjust(value) * factor)
+    int_part, frac = divmod(abs(scaled), factor)
+    sign = '-' if scaled < 0 else ''
+    if not frac:
+        return f"{sign}{int_part}"
+    return f"{sign}{int_part}.{str(frac).rjust(precision, '0').rstrip('0')}"
+
+
 class PrecisionManager:
     """
     功能：代币交易精度管理，从交易所获取精度并自动转换
-    入参：api_client - ApiClient实例
+    入参：api_client - ApiClient实例；cache_ttl - 市场列表缓存有效期（秒）
     返回值：精度管理器实例
     核心规则：1. 优先从WebSocket获取实时数据；2. 回退到REST API；3. 缓存精度信息
     """
     
-    def __init__(self, api_client: ApiClient):
+    # 固定属性集合：格式化热路径上的属性读取走槽位偏移，不经过实例__dict__
+    __slots__ = (
+        'api_client', 'order_api', 'logger', 'cache_ttl',
+        '_order_books_cache', '_order_books_inflight', '_symbol_aliases', '_unknown_symbols',
+        '_ingested_order_books', '_precision_cache', '_symbol_to_market_id', '_fmt',
+    )
+    
+    def __init__(self, api_client: ApiClient, cache_ttl: float = 300):
         """
         功能：初始化精度管理器
-        入参：api_client - ApiClient实例
+        入参：api_client - ApiClient实例；cache_ttl - 市场列表缓存有效期（秒）
         返回值：无
         核心规则：初始化API客户端和缓存字典
         """
         self.api_client = api_client
         self.order_api = OrderApi(api_client)
         self.logger = logging.getLogger(__name__)
+        self.cache_ttl = cache_ttl
+        
+        # 市场列表响应缓存：(过期时间, 验证头, 响应对象)
+        self._order_books_cache: Optional[Tuple[float, Dict[str, str], Any]] = None
+        
+        # 进行中的市场列表请求，并发查询共享同一请求
+        self._order_books_inflight: Optional[asyncio.Task] = None
+        
+        # 市场列表中交易对的别名（无歧义的基础币种、market_symbol的"-"写法）-> market_id
+        self._symbol_aliases: Dict[str, int] = {}
+        
+        # 未找到的交易对 -> 负缓存过期时间
+        self._unknown_symbols: Dict[str, float] = {}
+        
+        # 最近一次已写入缓存的市场列表响应（304沿用同一对象时跳过重复解析）
+        self._ingested_order_books: Any = None
         
         # 缓存市场精度信息：market_id -> 精度信息
         self._precision_cache: Dict[int, Dict[str, Any]] = {}
@@ -42,50 +207,114 @@ class PrecisionManager:
         # 缓存符号到market_id的映射
         self._symbol_to_market_id: Dict[str, int] = {}
         
+        # 按交易对预计算的格式化参数（一次查找取出全部字段）：
+        # symbol -> (价格舍入函数或None, 价格精度, 数量精度, 最小数量)
+        # 格式化结果由模块级_format_fixed_str按(数值, 精度)缓存，精度变化无需清空
+        self._fmt: Dict[str, Tuple[Optional[Callable[[float], float]], int, int, float]] = {}
+        
         self.logger.debug("精度管理器初始化完成")
     
-    async def get_market_info(self, symbol: str) -> Dict[str, Any]:
+    async def _fetch_order_books(self, force: bool = False) -> Any:
+        """
+        功能：获取交易所市场列表，并发调用共享同一个进行中的请求
+        入参：force - 是否忽略TTL强制向服务器验证
+        返回值：order_books响应对象
+        核心规则：1. TTL内直接返回缓存；2. 已有请求进行中时等待其结果，不重复发起请求
+        """
+        cached = self._order_books_cache
+        if cached and not force and time.monotonic() < cached[0]:
+            return cached[2]
+        
+        task = self._order_books_inflight
+        if task is None or task.done():
+            task = self._order_books_inflight = asyncio.ensure_future(self._request_order_books())
+        # shield避免单个调用方被取消时连带取消共享请求
+        return await asyncio.shield(task)
+    
+    async def _request_order_books(self) -> Any:
+        """
+        功能：向交易所请求市场列表，带条件请求缓存
+        入参：无
+        返回值：order_books响应对象
+        核心规则：1. 携带If-None-Match/If-Modified-Since；2. 服务器返回304时仅刷新过期时间，跳过JSON解析
+        """
+        now = time.monotonic()
+        cached = self._order_books_cache
+        
+        # 构造条件请求头
+        headers = None
+        if cached and cached[1]:
+            headers = {}
+            if 'ETag' in cached[1]:
+                headers['If-None-Match'] = cached[1]['ETag']
+            if 'Last-Modified' in cached[1]:
+                headers['If-Modified-Since'] = cached[1]['Last-Modified']
+        
+        try:
+            response = await self.order_api.order_books_with_http_info(_headers=headers)
+        except ApiException as e:
+            if e.status == 304 and cached:
+                self.logger.debug("市场列表未变化（304），沿用缓存")
+                self._order_books_cache = (now + self.cache_ttl, cached[1], cached[2])
+                return cached[2]
+            raise
+        
+        # 保存验证头
+        response_headers = response.headers or {}
+        validators = {
+            key: response_headers[key]
+            for key in ('ETag', 'Last-Modified')
+            if response_headers.get(key)
+        }
+        
+        self._order_books_cache = (now + self.cache_ttl, validators, response.data)
+        return response.data
+    
+    async def get_market_info(self, symbol: str, refresh: bool = False) -> Dict[str, Any]:
         """
         功能：获取交易对的市场信息，包括精度数据
-        入参：symbol - 交易对符号（如"ETH"）
-        返回值：Dict[str, Any] - 市场信息字典
-        核心规则：1. 检查缓存；2. 从交易所API获取；3. 解析精度数据
+        入参：symbol - 交易对符号（如"ETH"）；refresh - 是否忽略缓存重新验证
+        返回值：Dict[str, Any] - 市场信息字典（获取失败时为带is_default=True标记的默认精度）
+        核心规则：1. 检查缓存与负缓存；2. 从交易所API获取（支持304重新验证）；3. 精确匹配、基础币种、别名依次查找；
+                  4. 未找到的交易对在UNKNOWN_SYMBOL_TTL内直接返回默认精度
         """
         # 检查缓存
-        if symbol in self._symbol_to_market_id:
+        if not refresh and symbol in self._symbol_to_market_id:
             market_id = self._symbol_to_market_id[symbol]
             if market_id in self._precision_cache:
                 return self._precision_cache[market_id]
         
+        # 负缓存：最近确认不存在的交易对不再请求API
+        if not refresh:
+            expires = self._unknown_symbols.get(symbol)
+            if expires is not None:
+                if time.monotonic() < expires:
+                    return self._get_default_precision(symbol)
+                del self._unknown_symbols[symbol]
+        
         try:
             # 从交易所获取订单簿信息
-            order_books = await self.order_api.order_books()
+            order_books = await self._fetch_order_books(force=refresh)
             
-            # 查找匹配的交易对
-            market_id = None
-            market_info = None
+            # 一次响应填充全部交易对，后续交易对的首次查询直接命中缓存
+            self._ingest_order_books(order_books)
             
-            for order_book in order_books.order_books:
-                # 根据实际API响应，symbol字段包含交易对名称
-                if hasattr(order_book, 'symbol') and order_book.symbol == symbol:
-                    market_id = order_book.market_id
-                    market_info = self._parse_market_info(order_book)
-                    break
+            market_id = self._symbol_to_market_id.get(symbol)
+            market_info = self._precision_cache.get(market_id) if market_id is not None else None
             
             if market_id is None:
                 # 如果没有找到，尝试模糊匹配
                 # 例如，用户可能输入"ETH-USDT"，但交易所使用"ETH"
                 base_symbol = symbol.split('-')[0] if '-' in symbol else symbol
-                for order_book in order_books.order_books:
-                    if hasattr(order_book, 'symbol') and order_book.symbol == base_symbol:
-                        market_id = order_book.market_id
-                        market_info = self._parse_market_info(order_book)
-                        break
+                market_id = self._symbol_to_market_id.get(base_symbol)
+                if market_id is not None:
+                    market_info = self._precision_cache[market_id]
             
             if market_id is None:
-                # 如果仍然没有找到，尝试通过market_id映射
-                market_id = await self._symbol_to_market_id_from_api(symbol)
+                # 如果仍然没有找到，尝试通过别名映射
+                market_id = self._symbol_aliases.get(symbol)
                 if market_id is None:
+                    self._unknown_symbols[symbol] = time.monotonic() + UNKNOWN_SYMBOL_TTL
                     raise PrecisionManagerError(f"未找到交易对: {symbol}")
                 
                 # 获取特定market_id的详细信息
@@ -93,8 +322,7 @@ class PrecisionManager:
                 market_info = self._parse_market_details(order_book_details)
             
             # 缓存结果
-            self._symbol_to_market_id[symbol] = market_id
-            self._precision_cache[market_id] = market_info
+            self._cache_precision(symbol, market_id, market_info)
             
             self.logger.info(f"获取市场信息成功: {symbol} -> market_id: {market_id}")
             return market_info
@@ -104,33 +332,40 @@ class PrecisionManager:
             # 返回默认精度（如果API失败）
             return self._get_default_precision(symbol)
     
-    async def _symbol_to_market_id_from_api(self, symbol: str) -> Optional[int]:
+    def _ingest_order_books(self, order_books: Any):
         """
-        功能：通过API将符号转换为market_id
-        入参：symbol - 交易对符号
-        返回值：Optional[int] - market_id或None
-        核心规则：遍历订单簿查找匹配的符号
+        功能：将市场列表响应中的全部交易对写入精度缓存
+        入参：order_books - order_books响应对象
+        返回值：无
+        核心规则：1. 单次遍历填充symbol->market_id映射、别名映射和精度缓存；2. 同一响应对象只解析一次；
+                  3. 新响应可能包含新上线的交易对，清空负缓存
         """
-        try:
-            order_books = await self.order_api.order_books()
-            
-            # 根据实际API结构调整
-            # 假设order_books.order_books是列表，每个元素有market_id和symbol
-            for order_book in order_books.order_books:
-                if hasattr(order_book, 'symbol') and order_book.symbol == symbol:
-                    return order_book.market_id
+        if order_books is self._ingested_order_books:
+            return
+        
+        aliases: Dict[str, Optional[int]] = {}
+        for order_book in order_books.order_books:
+            if hasattr(order_book, 'symbol') and hasattr(order_book, 'market_id'):
+                symbol = sys.intern(order_book.symbol)
+                market_id = order_book.market_id
+                self._cache_precision(symbol, market_id, self._parse_market_info(order_book))
                 
-                # 尝试其他可能的字段名
-                if hasattr(order_book, 'market_symbol'):
-                    market_symbol = order_book.market_symbol.replace('/', '-')
-                    if market_symbol == symbol:
-                        return order_book.market_id
-            
-            return None
-            
-        except Exception as e:
-            self.logger.error(f"转换符号到market_id失败: {symbol}, 错误: {e}")
-            return None
+                # 基础币种别名：多个市场共用同一基础币种时视为有歧义，不建立映射
+                if '-' in symbol:
+                    base_symbol = symbol.split('-')[0]
+                    aliases[base_symbol] = market_id if aliases.get(base_symbol, market_id) == market_id else None
+                
+                market_symbol = getattr(order_book, 'market_symbol', None)
+                if market_symbol:
+                    aliases[market_symbol.replace('/', '-')] = market_id
+        
+        self._symbol_aliases = {
+            alias: market_id
+            for alias, market_id in aliases.items()
+            if market_id is not None and alias not in self._symbol_to_market_id
+        }
+        self._unknown_symbols.clear()
+        self._ingested_order_books = order_books
     
     def _parse_market_info(self, order_book: Any) -> Dict[str, Any]:
         """
@@ -139,24 +374,13 @@ class PrecisionManager:
         返回值：Dict[str, Any] - 解析后的市场信息
         核心规则：从订单簿对象中提取价格精度、数量精度等信息
         """
-        # 根据实际API响应结构调整
-        # 从用户提供的API响应中，我们可以看到以下字段：
-        # symbol, market_id, market_type, base_asset_id, quote_asset_id, status
-        # taker_fee, maker_fee, liquidation_fee, min_base_amount, min_quote_amount
-        # order_quote_limit, supported_size_decimals, supported_price_decimals, supported_quote_decimals
-        
-        # 获取精度信息
-        price_precision = getattr(order_book, 'supported_price_decimals', 2)
-        quantity_precision = getattr(order_book, 'supported_size_decimals', 4)
-        
-        # 获取最小数量
-        min_quantity_str = getattr(order_book, 'min_base_amount', '0.001')
-        min_notional_str = getattr(order_book, 'min_quote_amount', '10.0')
-        
-        # 解析市场类型和资产信息
-        market_type = getattr(order_book, 'market_type', 'perp')
-        base_asset_id = getattr(order_book, 'base_asset_id', 0)
-        quote_asset_id = getattr(order_book, 'quote_asset_id', 0)
+        # 一次attrgetter调用取出全部字段；缺少字段的对象才逐个getattr取默认值
+        try:
+            values = _MARKET_ATTRS(order_book)
+        except AttributeError:
+            values = tuple(getattr(order_book, name, default) for name, default in _MARKET_ATTR_DEFAULTS)
+        (symbol, market_id, market_type, base_asset_id, quote_asset_id, status, taker_fee, maker_fee,
+         min_quantity_str, min_notional_str, quantity_precision, price_precision) = values
         
         # 根据市场类型确定报价资产
         if market_type == 'spot':
@@ -165,20 +389,20 @@ class PrecisionManager:
             quote_asset = 'USD'   # 永续合约使用USD
         
         market_info = {
-            'symbol': getattr(order_book, 'symbol', 'UNKNOWN'),
-            'market_id': getattr(order_book, 'market_id', 0),
+            'symbol': symbol,
+            'market_id': market_id,
             'market_type': market_type,
             'base_asset_id': base_asset_id,
             'quote_asset_id': quote_asset_id,
-            'base_asset': getattr(order_book, 'symbol', 'UNKNOWN'),  # 基础资产就是符号本身
+            'base_asset': symbol,  # 基础资产就是符号本身
             'quote_asset': quote_asset,
             'price_precision': int(price_precision),
             'quantity_precision': int(quantity_precision),
             'min_quantity': float(min_quantity_str),
             'min_notional': float(min_notional_str),
-            'status': getattr(order_book, 'status', 'unknown'),
-            'taker_fee': float(getattr(order_book, 'taker_fee', '0.0000')),
-            'maker_fee': float(getattr(order_book, 'maker_fee', '0.0000')),
+            'status': status,
+            'taker_fee': float(taker_fee),
+            'maker_fee': float(maker_fee),
         }
         
         return market_info
@@ -205,124 +429,147 @@ class PrecisionManager:
         return market_info
     
     def _extract_precision(self, tick_size: str) -> int:
-        """
-        功能：从tick_size字符串中提取精度（小数位数）
-        入参：tick_size - tick大小字符串（如"0.01"）
-        返回值：int - 精度（小数位数）
-        核心规则：计算小数点后的位数
-        """
-        if '.' not in tick_size:
-            return 0
-        
-        # 移除末尾的0
-        decimal_part = tick_size.split('.')[1].rstrip('0')
-        return len(decimal_part)
+        """从tick_size字符串中提取精度（小数位数），委托给模块级缓存函数"""
+        return _extract_precision(tick_size)
     
     def _get_default_precision(self, symbol: str) -> Dict[str, Any]:
         """
         功能：获取默认精度（当API失败时使用）
         入参：symbol - 交易对符号
-        返回值：Dict[str, Any] - 默认精度信息
-        核心规则：根据常见交易对提供合理的默认值
+        返回值：Dict[str, Any] - 默认精度信息（带is_default=True标记）
+        核心规则：1. 根据常见交易对提供合理的默认值；2. 默认值不写入精度缓存
         """
         self.logger.warning(f"使用默认精度: {symbol}")
         
-        # 常见交易对的默认精度
-        default_precisions = {
-            'BTC-USDT': {'price': 2, 'quantity': 6},
-            'ETH-USDT': {'price': 2, 'quantity': 4},
-            'SOL-USDT': {'price': 3, 'quantity': 2},
-        }
-        
-        precision = default_precisions.get(symbol, {'price': 2, 'quantity': 4})
+        price_precision, quantity_precision = _DEFAULT_PRECISIONS.get(symbol, (2, 4))
+        parts = symbol.split('-')
         
         return {
             'symbol': symbol,
-            'market_id': 0,
-            'base_asset': symbol.split('-')[0],
-            'quote_asset': symbol.split('-')[1] if '-' in symbol else 'USDT',
-            'price_precision': precision['price'],
-            'quantity_precision': precision['quantity'],
-            'min_quantity': 0.001,
-            'min_notional': 10.0,
+            'base_asset': parts[0],
+            'quote_asset': parts[1] if len(parts) > 1 else 'USDT',
+            'price_precision': price_precision,
+            'quantity_precision': quantity_precision,
+            **_DEFAULT_MARKET_INFO_TEMPLATE,
         }
     
+    def _cache_precision(self, symbol: str, market_id: int, market_info: Dict[str, Any]):
+        """
+        功能：缓存交易对的精度信息并预计算格式化参数
+        入参：symbol - 交易对符号；market_id - 市场ID；market_info - 市场信息
+        返回值：无
+        核心规则：生成该交易对的价格舍入函数和格式化参数
+        """
+        self._symbol_to_market_id[symbol] = market_id
+        self._precision_cache[market_id] = market_info
+        
+        price_precision = market_info['price_precision']
+        quantity_precision = market_info['quantity_precision']
+        self._fmt[symbol] = (
+            _compile_price_fn(price_precision),
+            price_precision,
+            quantity_precision,
+            market_info['min_quantity'],
+        )
+    
+    def _get_cached_market_info(self, symbol: str) -> Dict[str, Any]:
+        """获取已缓存的市场信息，未缓存时返回默认精度"""
+        market_id = self._symbol_to_market_id.get(symbol)
+        market_info = self._precision_cache.get(market_id) if market_id is not None else None
+        if market_info is None:
+            market_info = self._get_default_precision(symbol)
+        return market_info
+    
+    def _format_price(self, price: float, symbol: str) -> str:
+        """格式化价格，按交易对的价格精度委托给模块级缓存函数"""
+        fmt = self._fmt.get(symbol)
+        precision = fmt[1] if fmt is not None else self._get_cached_market_info(symbol)['price_precision']
+        return _format_fixed_str(price, precision)
+    
+    def _format_quantity(self, quantity: float, symbol: str) -> str:
+        """格式化数量，不小于最小数量，按交易对的数量精度委托给模块级缓存函数"""
+        fmt = self._fmt.get(symbol)
+        if fmt is not None:
+            precision, min_quantity = fmt[2], fmt[3]
+        else:
+            market_info = self._get_cached_market_info(symbol)
+            precision, min_quantity = market_info['quantity_precision'], market_info['min_quantity']
+        
+        # 确保数量不小于最小数量
+        if quantity < min_quantity:
+            quantity = min_quantity
+        
+        return _format_fixed_str(quantity, precision)
+    
     def format_price(self, price: float, symbol: str) -> str:
         """
         功能：格式化价格到正确的精度
         入参：price - 原始价格；symbol - 交易对符号
         返回值：str - 格式化后的价格字符串
-        核心规则：根据交易对的精度进行四舍五入
+        核心规则：根据交易对的精度进行四舍五入，重复的(价格, 精度)直接命中LRU缓存
         """
-        market_info = self._precision_cache.get(
-            self._symbol_to_market_id.get(symbol, 0),
-            self._get_default_precision(symbol)
-        )
-        
-        precision = market_info['price_precision']
-        formatted = f"{price:.{precision}f}"
-        return formatted.rstrip('0').rstrip('.') if '.' in formatted else formatted
+        return self._format_price(price, symbol)
     
     def format_quantity(self, quantity: float, symbol: str) -> str:
         """
         功能：格式化数量到正确的精度
         入参：quantity - 原始数量；symbol - 交易对符号
         返回值：str - 格式化后的数量字符串
-        核心规则：根据交易对的精度进行四舍五入
+        核心规则：根据交易对的精度进行四舍五入，重复的(数量, 精度)直接命中LRU缓存
         """
-        market_info = self._precision_cache.get(
-            self._symbol_to_market_id.get(symbol, 0),
-            self._get_default_precision(symbol)
-        )
-        
-        precision = market_info['quantity_precision']
-        min_quantity = market_info['min_quantity']
-        
-        # 确保数量不小于最小数量
-        if quantity < min_quantity:
-            quantity = min_quantity
-        
-        formatted = f"{quantity:.{precision}f}"
-        return formatted.rstrip('0').rstrip('.') if '.' in formatted else formatted
+        return self._format_quantity(quantity, symbol)
     
     def adjust_to_tick_size(self, price: float, symbol: str) -> float:
         """
         功能：调整价格到tick size的倍数
         入参：price - 原始价格；symbol - 交易对符号
         返回值：float - 调整后的价格
-        核心规则：根据价格精度进行舍入
+        核心规则：1. 已加载的交易对直接调用生成的舍入函数；2. 否则复用价格格式化缓存
         """
-        market_info = self._precision_cache.get(
-            self._symbol_to_market_id.get(symbol, 0),
-            self._get_default_precision(symbol)
-        )
-        
-        precision = market_info['price_precision']
-        factor = 10 ** precision
-        
-        # 四舍五入到指定精度
-        adjusted = round(price * factor) / factor
-        return adjusted
+        fmt = self._fmt.get(symbol)
+        if fmt is not None and fmt[0] is not None:
+            return fmt[0](price)
+        return float(self._format_price(price, symbol))
     
     async def refresh_cache(self):
         """刷新精度缓存"""
         self.logger.info("刷新精度缓存")
+        previous_symbols = list(self._symbol_to_market_id)
         self._precision_cache.clear()
         self._symbol_to_market_id.clear()
+        self._fmt.clear()
+        self._symbol_aliases = {}
+        self._unknown_symbols.clear()
+        self._ingested_order_books = None
         
         try:
             # 重新获取所有订单簿信息
-            order_books = await self.order_api.order_books()
+            order_books = await self._fetch_order_books(force=True)
+            
+            self._ingest_order_books(order_books)
             
-            for order_book in order_books.order_books:
-                if hasattr(order_book, 'symbol') and hasattr(order_book, 'market_id'):
-                    symbol = order_book.symbol
-                    market_id = order_book.market_id
-                    
-                    self._symbol_to_market_id[symbol] = market_id
-                    self._precision_cache[market_id] = self._parse_market_info(order_book)
+            # 市场列表中没有的交易对（如"ETH-USDT"别名）并发重新解析
+            missing = [symbol for symbol in previous_symbols if symbol not in self._symbol_to_market_id]
+            if missing:
+                await asyncio.gather(*(self.get_market_info(symbol) for symbol in missing))
             
             self.logger.info(f"精度缓存刷新完成，缓存了 {len(self._precision_cache)} 个市场")
             
         except Exception as e:
             self.logger.error(f"刷新精度缓存失败: {e}")
+    
+    async def aclose(self):
+        """
+        功能：关闭精度管理器
+        入参：无
+        返回值：无
+        核心规则：取消进行中的市场列表请求；HTTP会话归属共享的ApiClient，由其使用者负责关闭
+        """
+        task = self._order_books_inflight
+        self._order_books_inflight = None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
@@ -1,15 +1,81 @@
 """
 文件名：websocket_client.py
 用途：Lighter交易所WebSocket客户端，实现实时数据订阅和消息处理
-依赖：websockets, asyncio, json, logging, typing
-核心功能：1. WebSocket连接管理；2. 实时数据订阅；3. 消息回调处理；4. 自动重连机制
+依赖：websockets, asyncio, contextlib, functools, orjson/ujson/json, logging, random, socket, sys, typing, local_order_book, _ws_dispatch, _ws_dispatch_c（可选）, picows（可选）
+核心功能：1. WebSocket连接管理；2. 实时数据订阅；3. 消息回调处理；4. 自动重连机制；5. 可选picows高性能传输
 """
 
 import asyncio
-import json
+import contextlib
+import functools
 import logging
-from typing import Dict, List, Optional, Callable, Any
+import random
+import socket
+import sys
+from typing import Dict, Optional, Callable, Any, Tuple, Union
 import websockets
+import websockets.exceptions
+
+# JSON编解码：优先orjson（C实现，直接解析/生成bytes，收发均不经过str），其次ujson，最后标准库json
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    try:
+        import ujson as _json
+        JSONDecodeError = ValueError
+    except ImportError:
+        import json as _json
+        JSONDecodeError = _json.JSONDecodeError
+    json_loads = _json.loads
+    json_dumps = _json.dumps
+
+from .local_order_book import LocalOrderBook, CLocalOrderBook, create_order_book
+
+try:
+    # Cython编译的分发内核（python -m src._build_cython生成），未编译时使用同源的纯Python实现
+    from ._ws_dispatch_c import route_message, route_channel
+    CYTHON_DISPATCH_AVAILABLE = True
+except ImportError:
+    from ._ws_dispatch import route_message, route_channel
+    CYTHON_DISPATCH_AVAILABLE = False
+
+try:
+    # picows为可选依赖：C实现的帧解析，适合高频订单簿推送
+    from picows import ws_connect as picows_connect, WSListener, WSMsgType, WSCloseCode
+    PICOWS_AVAILABLE = True
+except ImportError:
+    picows_connect = None
+    WSListener = object
+    PICOWS_AVAILABLE = False
+
+
+# pong回复内容固定，模块加载时编码一次
+_PONG_PAYLOAD = json_dumps({'type': 'pong'})
+
+# 接收队列容量：接收任务与消息处理任务之间的缓冲，队列满时接收暂停等待处理（订单簿增量不可丢弃）
+MESSAGE_QUEUE_SIZE = 1024
+
+# 批量发送时合并小帧的套接字选项（仅Linux提供TCP_CORK，其他平台逐帧发送）
+_TCP_CORK = getattr(socket, 'TCP_CORK', None)
+
+# 支持订阅的频道类型
+SUPPORTED_CHANNEL_TYPES = ('order_book', 'trade', 'account_all', 'ticker')
+
+# 频道类型 -> (日志名称, 标识符名称)
+_CHANNEL_LABELS = {
+    'order_book': ('订单簿', 'market_id'),
+    'trade': ('交易', 'market_id'),
+    'account_all': ('账户', 'account_id'),
+    'ticker': ('Ticker', 'symbol'),
+}
+
+# 支持的传输层
+TRANSPORT_WEBSOCKETS = 'websockets'
+TRANSPORT_PICOWS = 'picows'
+SUPPORTED_TRANSPORTS = (TRANSPORT_WEBSOCKETS, TRANSPORT_PICOWS)
 
 
 class WebSocketClientError(Exception):
@@ -17,54 +83,197 @@ class WebSocketClientError(Exception):
     pass
 
 
+class _PicowsConnectionClosed(WebSocketClientError):
+    """picows连接已关闭"""
+    pass
+
+
+class _PicowsListener(WSListener):
+    """
+    功能：picows帧监听器，将完整消息投递到接收队列
+    入参：loop - 事件循环
+    返回值：监听器实例
+    核心规则：1. 单帧消息直接复制负载；2. 分片消息复用同一个bytearray拼接；3. 自动回复ping；
+              4. 收到pong时唤醒所有等待中的ping
+    """
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.pong_waiters: list = []
+        
+        # 每个连接复用一块分片缓冲区，避免逐帧分配
+        self._fragment_buffer = bytearray()
+    
+    def on_ws_frame(self, transport, frame):
+        """处理收到的WebSocket帧"""
+        msg_type = frame.msg_type
+        
+        if msg_type == WSMsgType.TEXT or msg_type == WSMsgType.BINARY:
+            if frame.fin:
+                self._deliver(frame.get_payload_as_bytes())
+            else:
+                self._fragment_buffer.clear()
+                self._fragment_buffer += frame.get_payload_as_memoryview()
+        elif msg_type == WSMsgType.CONTINUATION:
+            self._fragment_buffer += frame.get_payload_as_memoryview()
+            if frame.fin:
+                self._deliver(bytes(self._fragment_buffer))
+                self._fragment_buffer.clear()
+        elif msg_type == WSMsgType.PING:
+            transport.send_pong(frame.get_payload_as_bytes())
+        elif msg_type == WSMsgType.PONG:
+            self._loop.call_soon_threadsafe(self._resolve_pongs)
+        elif msg_type == WSMsgType.CLOSE:
+            transport.send_close(frame.get_close_code())
+            transport.disconnect()
+    
+    def on_ws_disconnected(self, transport):
+        """连接断开时投递None作为结束标记"""
+        self._deliver(None)
+    
+    def _resolve_pongs(self):
+        """唤醒所有等待pong的ping（pong应答此前发出的全部ping）"""
+        waiters, self.pong_waiters = self.pong_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+    
+    def _deliver(self, payload: Optional[bytes]):
+        """投递消息到接收队列（可从任意线程调用）"""
+        self._loop.call_soon_threadsafe(self.queue.put_nowait, payload)
+
+
+class _PicowsConnection:
+    """
+    功能：picows连接适配器，提供与websockets连接一致的recv/send/close接口
+    入参：transport - picows传输对象；listener - 帧监听器
+    返回值：连接适配器实例
+    核心规则：消息处理逻辑与传输层解耦，上层代码无需感知具体传输实现
+    """
+    
+    def __init__(self, transport, listener: _PicowsListener):
+        self._transport = transport
+        self._listener = listener
+    
+    @property
+    def transport(self):
+        """底层asyncio传输对象（与websockets连接的transport属性一致）"""
+        return getattr(self._transport, 'underlying_transport', None)
+    
+    async def recv(self, decode: Optional[bool] = None) -> bytes:
+        """接收一条完整消息（始终返回bytes，decode参数仅为与websockets接口一致）"""
+        payload = await self._listener.queue.get()
+        if payload is None:
+            raise _PicowsConnectionClosed("picows连接已关闭")
+        return payload
+    
+    async def send(self, message: Union[str, bytes], text: Optional[bool] = None):
+        """发送文本消息（始终为文本帧，text参数仅为与websockets接口一致）"""
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+        self._transport.send(WSMsgType.TEXT, message)
+    
+    async def ping(self) -> asyncio.Future:
+        """发送ping帧，返回收到pong时完成的future（与websockets的ping接口一致）"""
+        waiter = asyncio.get_running_loop().create_future()
+        self._listener.pong_waiters.append(waiter)
+        self._transport.send_ping()
+        return waiter
+    
+    async def close(self):
+        """关闭连接并等待断开完成"""
+        self._transport.send_close(WSCloseCode.OK)
+        self._transport.disconnect()
+        await self._transport.wait_disconnected()
+
+
+# 连接关闭异常（兼容两种传输层）
+CONNECTION_CLOSED_ERRORS = (websockets.exceptions.ConnectionClosed, _PicowsConnectionClosed)
+
+
 class LighterWebSocketClient:
     """
     功能：Lighter交易所WebSocket客户端，实现实时数据订阅和消息处理
-    入参：ws_url - WebSocket服务器URL；logger - 日志记录器
+    入参：ws_url - WebSocket服务器URL；logger - 日志记录器；transport - 传输层（websockets/picows）；
+          ob_max_depth - 本地订单簿每侧最大档位数（0表示不限制）
     返回值：WebSocket客户端实例
     核心规则：1. 优先使用WebSocket获取实时数据；2. 实现自动重连；3. 支持多频道订阅
     """
     
-    def __init__(self, ws_url: str, logger: Optional[logging.Logger] = None):
+    # 固定属性集合：每条消息都会读取的属性走槽位偏移，不经过实例__dict__
+    __slots__ = (
+        'ws_url', 'logger', 'transport', 'connected', 'connecting', 'reconnecting', 'websocket',
+        'subscriptions', '_channels', 'ob_max_depth', 'order_books', 'order_book_top_n',
+        '_sub_payload_cache', 'message_handlers', '_stopping', '_receive_task', '_consumer_task',
+        'reconnect_attempts', 'max_reconnect_attempts', 'reconnect_delay', 'max_reconnect_delay',
+    )
+    
+    def __init__(self, ws_url: str, logger: Optional[logging.Logger] = None,
+                 transport: str = TRANSPORT_WEBSOCKETS, ob_max_depth: int = 0):
         """
         功能：初始化WebSocket客户端
-        入参：ws_url - WebSocket服务器URL；logger - 日志记录器
+        入参：ws_url - WebSocket服务器URL；logger - 日志记录器；transport - 传输层（websockets/picows）；
+              ob_max_depth - 本地订单簿每侧最大档位数（0表示不限制）
         返回值：无
-        核心规则：初始化连接状态、订阅频道和回调函数
+        核心规则：1. 初始化连接状态、订阅频道和回调函数；2. picows不可用时回退到websockets
         """
         self.ws_url = ws_url
         self.logger = logger or logging.getLogger(__name__)
         
+        # 传输层选择
+        if transport not in SUPPORTED_TRANSPORTS:
+            raise WebSocketClientError(f"不支持的传输层: {transport}，支持: {', '.join(SUPPORTED_TRANSPORTS)}")
+        if transport == TRANSPORT_PICOWS and not PICOWS_AVAILABLE:
+            self.logger.warning("未安装picows，回退到websockets传输层")
+            transport = TRANSPORT_WEBSOCKETS
+        self.transport = transport
+        
         # 连接状态
         self.connected = False
         self.connecting = False
         self.reconnecting = False
         
-        # WebSocket连接对象
-        self.websocket: Optional[websockets.WebSocketClientProtocol] = None
+        # WebSocket连接对象（websockets连接或picows连接适配器）
+        self.websocket: Optional[Union[websockets.WebSocketClientProtocol, _PicowsConnection]] = None
         
-        # 订阅管理
-        self.subscriptions: Dict[str, List[Callable]] = {
-            'order_book': {},      # market_id -> 回调函数列表
-            'trade': {},           # market_id -> 回调函数列表
-            'account_all': {},     # account_id -> 回调函数列表
-            'ticker': {},          # symbol -> 回调函数列表
-        }
+        # 订阅管理：按服务器推送的完整频道字符串（如order_book:42）索引，分发时无需拆分channel；
+        # 常见情况只有一个回调，直接保存回调本身，出现第二个订阅者时才升级为元组
+        self.subscriptions: Dict[str, Union[Callable, Tuple[Callable, ...]]] = {}
+        
+        # 频道字符串 -> (频道类型, 标识符)，订阅时登记
+        self._channels: Dict[str, Tuple[str, str]] = {}
+        
+        # 本地订单簿：market_id -> CLocalOrderBook/LocalOrderBook
+        self.ob_max_depth = ob_max_depth
+        self.order_books: Dict[str, Union[CLocalOrderBook, LocalOrderBook]] = {}
+        
+        # 订单簿订阅深度：market_id -> top_n（回调只需前N档时裁剪原始档位列表）
+        self.order_book_top_n: Dict[str, int] = {}
+        
+        # 订阅消息缓存：(channel_type, identifier, top_n) -> 已编码的订阅消息，重连重订阅时不再重复编码
+        self._sub_payload_cache: Dict[Tuple[str, str, int], Union[str, bytes]] = {}
         
-        # 消息处理器
-        self.message_handlers = {
+        # 消息处理器：键在构造时驻留，与orjson解析出的type字符串比较时可走指针相等的快速路径
+        message_handlers = {
             'connected': self._handle_connected,
             'ping': self._handle_ping,
             'pong': self._handle_pong,
-            'subscribed/order_book': self._handle_subscribed_order_book,
-            'update/order_book': self._handle_update_order_book,
-            'subscribed/trade': self._handle_subscribed_trade,
-            'update/trade': self._handle_update_trade,
-            'subscribed/account_all': self._handle_subscribed_account,
-            'update/account_all': self._handle_update_account,
-            'subscribed/ticker': self._handle_subscribed_ticker,
-            'update/ticker': self._handle_update_ticker,
         }
+        # 各频道的订阅确认/更新消息共用_dispatch，按(频道类型, 事件)偏函数注册
+        for channel_type in SUPPORTED_CHANNEL_TYPES:
+            for event in ('subscribed', 'update'):
+                message_handlers[f"{event}/{channel_type}"] = functools.partial(self._dispatch, channel_type, event)
+        self.message_handlers: Dict[str, Callable] = {
+            sys.intern(message_type): handler for message_type, handler in message_handlers.items()
+        }
+        
+        # 是否已主动断开（主动断开后不再重连）
+        self._stopping = False
+        
+        # 接收任务和消息处理任务（持有引用，避免任务被回收）
+        self._receive_task: Optional[asyncio.Task] = None
+        self._consumer_task: Optional[asyncio.Task] = None
         
         # 重连配置
         self.reconnect_attempts = 0
@@ -72,29 +281,47 @@ class LighterWebSocketClient:
         self.reconnect_delay = 1  # 初始重连延迟（秒）
         self.max_reconnect_delay = 30  # 最大重连延迟（秒）
         
-        self.logger.debug(f"WebSocket客户端初始化完成，URL: {ws_url}")
+        self.logger.debug(f"WebSocket客户端初始化完成，URL: {ws_url}，传输层: {self.transport}")
     
     async def connect(self):
         """
         功能：连接到WebSocket服务器
         入参：无
         返回值：bool - 连接是否成功
-        核心规则：1. 建立WebSocket连接；2. 等待连接确认；3. 处理连接错误
+        核心规则：1. 建立连接并等待确认；2. 启动唯一的接收任务（断线重连也在该任务内完成）；3. 重新订阅已有频道
         """
         if self.connected or self.connecting:
             self.logger.warning("WebSocket已经在连接或已连接")
             return self.connected
         
+        self._stopping = False
+        if not await self._establish():
+            return False
+        
+        # 启动消息接收任务
+        self._receive_task = asyncio.create_task(self._run())
+        
+        # 重新订阅之前订阅的频道
+        await self._resubscribe_all()
+        
+        return True
+    
+    async def _establish(self) -> bool:
+        """
+        功能：建立底层连接并等待服务器的连接确认
+        入参：无
+        返回值：bool - 连接是否成功
+        核心规则：1. 只负责建连和握手，不创建任务，首次连接和重连共用；2. 失败时关闭已打开的连接
+        """
         self.connecting = True
-        self.reconnecting = False
         
         try:
             self.logger.info(f"连接到WebSocket: {self.ws_url}")
-            self.websocket = await websockets.connect(self.ws_url)
+            self.websocket = await self._open_connection()
             
             # 等待连接确认消息
-            message = await asyncio.wait_for(self.websocket.recv(), timeout=5)
-            message_data = json.loads(message)
+            message = await asyncio.wait_for(self.websocket.recv(decode=False), timeout=5)
+            message_data = json_loads(message)
             
             if message_data.get('type') == 'connected':
                 self.connected = True
@@ -103,39 +330,58 @@ class LighterWebSocketClient:
                 self.reconnect_delay = 1
                 
                 self.logger.info("WebSocket连接成功")
-                
-                # 启动消息接收任务
-                asyncio.create_task(self._receive_messages())
-                
-                # 重新订阅之前订阅的频道
-                await self._resubscribe_all()
-                
                 return True
-            else:
-                self.logger.error(f"意外的连接响应: {message_data}")
-                await self.disconnect()
-                return False
+            
+            self.logger.error(f"意外的连接响应: {message_data}")
                 
         except asyncio.TimeoutError:
             self.logger.error("连接超时")
-            await self.disconnect()
-            return False
             
         except Exception as e:
             self.logger.error(f"连接失败: {e}")
-            await self.disconnect()
-            return False
+        
+        self.connecting = False
+        await self._close_socket()
+        return False
+    
+    async def _open_connection(self):
+        """
+        功能：根据传输层建立底层WebSocket连接
+        入参：无
+        返回值：连接对象（均提供recv/send/close接口）
+        核心规则：picows走C帧解析路径，websockets作为默认和回退实现
+        """
+        if self.transport == TRANSPORT_PICOWS:
+            loop = asyncio.get_running_loop()
+            transport, listener = await picows_connect(lambda: _PicowsListener(loop), self.ws_url)
+            return _PicowsConnection(transport, listener)
+        
+        return await websockets.connect(self.ws_url)
     
     async def disconnect(self):
         """
         功能：断开WebSocket连接
         入参：无
         返回值：无
-        核心规则：1. 关闭WebSocket连接；2. 更新连接状态；3. 清理资源
+        核心规则：1. 标记主动断开，接收任务不再重连；2. 正在重连时取消接收任务；3. 关闭WebSocket连接
         """
+        self._stopping = True
         self.connected = False
         self.connecting = False
         
+        task = self._receive_task
+        if self.reconnecting and task is not None and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            self.reconnecting = False
+        
+        await self._close_socket()
+    
+    async def _close_socket(self):
+        """关闭当前底层连接（不改变是否重连的状态）"""
         if self.websocket:
             try:
                 await self.websocket.close()
@@ -145,119 +391,201 @@ class LighterWebSocketClient:
             finally:
                 self.websocket = None
     
-    async def _receive_messages(self):
+    async def _run(self):
         """
-        功能：接收和处理WebSocket消息
+        功能：接收任务主循环：接收消息，连接意外断开时在本任务内重连
         入参：无
         返回值：无
-        核心规则：1. 持续接收消息；2. 解析JSON；3. 分发给对应的处理器
+        核心规则：1. 每次断线不再新建接收任务；2. 主动断开或重连失败时退出
         """
-        while self.connected and self.websocket:
-            try:
-                message = await self.websocket.recv()
-                await self._process_message(message)
-                
-            except websockets.exceptions.ConnectionClosed:
-                self.logger.warning("WebSocket连接已关闭")
-                self.connected = False
-                await self._handle_disconnection()
-                break
-                
-            except Exception as e:
-                self.logger.error(f"接收消息时出错: {e}")
-                # 继续接收下一条消息
+        while await self._receive_messages():
+            if not await self._handle_disconnection():
+                return
+    
+    async def _receive_messages(self) -> bool:
+        """
+        功能：在当前连接上接收WebSocket消息并放入接收队列
+        入参：无
+        返回值：bool - 连接是否意外断开（需要重连）
+        核心规则：1. 接收与回调解耦：本任务只做recv和入队，解析和回调在处理任务中执行；
+                  2. 队列满时等待处理任务消费（背压），保证消息有序且不丢失；
+                  3. 连接关闭等异常跳出整个循环后统一处理；4. 主动断开时不触发重连
+        """
+        # 循环内只读局部变量：连接对象在本次连接期间不变，断开后循环退出
+        recv = self.websocket.recv
+        queue: asyncio.Queue = asyncio.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+        put = queue.put
+        self._consumer_task = asyncio.create_task(self._consume_messages(queue))
+        backlogged = False
+        
+        try:
+            while self.connected:
+                # decode=False：文本帧直接以UTF-8 bytes交给JSON解析，省去一次解码
+                message = await recv(decode=False)
+                if queue.full() != backlogged:
+                    backlogged = not backlogged
+                    if backlogged:
+                        self.logger.warning(f"接收队列已满（{MESSAGE_QUEUE_SIZE}），消息处理跟不上接收速度")
+                await put(message)
+            return False
+        except CONNECTION_CLOSED_ERRORS:
+            if not self.connected:
+                return False
+            self.logger.warning("WebSocket连接已关闭")
+            self.connected = False
+        except Exception as e:
+            if not self.connected:
+                return False
+            # 连接状态未知，先关闭当前连接再重连
+            self.logger.error(f"接收消息时出错: {e}")
+            self.connected = False
+            await self._close_socket()
+        finally:
+            self._stop_consumer(queue)
+        
+        return True
+    
+    def _stop_consumer(self, queue: asyncio.Queue):
+        """
+        功能：通知消息处理任务退出
+        入参：queue - 消息处理任务使用的接收队列
+        返回值：无
+        核心规则：投递None哨兵，处理完已入队的消息后退出；队列已满时直接取消
+        """
+        try:
+            queue.put_nowait(None)
+        except asyncio.QueueFull:
+            if self._consumer_task is not None:
+                self._consumer_task.cancel()
+    
+    async def _consume_messages(self, queue: asyncio.Queue):
+        """
+        功能：从接收队列取出消息并处理
+        入参：queue - 接收队列
+        返回值：无
+        核心规则：1. 单个处理任务按接收顺序处理，保证订单簿增量有序；2. 收到None哨兵时退出
+        """
+        get = queue.get
+        process = self._process_message
+        
+        while True:
+            message = await get()
+            if message is None:
+                return
+            await process(message)
     
-    async def _process_message(self, message: str):
+    async def _process_message(self, message: bytes):
         """
         功能：处理接收到的WebSocket消息
-        入参：message - 原始消息字符串
+        入参：message - 原始消息（UTF-8编码的bytes）
         返回值：无
-        核心规则：1. 解析JSON；2. 根据消息类型调用处理器；3. 触发回调函数
+        核心规则：1. 解析JSON并查找处理器（同步路由内核，可由Cython编译）；2. 调用处理器；3. 触发回调函数
         """
         try:
-            data = json.loads(message)
-            message_type = data.get('type')
-            
-            # 调用对应的消息处理器
-            handler = self.message_handlers.get(message_type)
-            if handler:
-                await handler(data)
-            else:
-                self.logger.debug(f"未处理的消息类型: {message_type}")
+            handler, data = route_message(message, self.message_handlers, json_loads)
+            if handler is None:
+                self.logger.debug(f"未处理的消息类型: {data.get('type')}")
+                return
+            await handler(data)
                 
-        except json.JSONDecodeError:
+        except JSONDecodeError:
             self.logger.error(f"JSON解析失败: {message}")
         except Exception as e:
             self.logger.error(f"处理消息时出错: {e}")
     
-    async def _handle_disconnection(self):
+    async def _handle_disconnection(self) -> bool:
         """
-        功能：处理连接断开
+        功能：处理连接断开，在接收任务内重连
         入参：无
-        返回值：无
-        核心规则：1. 尝试自动重连；2. 指数退避重连延迟
+        返回值：bool - 是否重连成功
+        核心规则：1. 指数退避加随机抖动，避免多个客户端同时重连；2. 主动断开时立即停止；3. 重连成功后重新订阅
         """
-        if self.reconnecting:
-            return
-        
         self.reconnecting = True
         
-        while self.reconnect_attempts < self.max_reconnect_attempts:
-            self.reconnect_attempts += 1
-            self.logger.info(f"尝试重连 ({self.reconnect_attempts}/{self.max_reconnect_attempts})...")
-            
-            # 等待重连延迟
-            await asyncio.sleep(self.reconnect_delay)
-            
-            # 尝试重连
-            if await self.connect():
-                self.reconnecting = False
-                return
+        try:
+            while self.reconnect_attempts < self.max_reconnect_attempts and not self._stopping:
+                self.reconnect_attempts += 1
+                self.logger.info(f"尝试重连 ({self.reconnect_attempts}/{self.max_reconnect_attempts})...")
+                
+                # 等待重连延迟（抖动范围为延迟的后一半）
+                await asyncio.sleep(self.reconnect_delay * random.uniform(0.5, 1.0))
+                
+                # 尝试重连
+                if not self._stopping and await self._establish():
+                    await self._resubscribe_all()
+                    return True
+                
+                # 指数退避
+                self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
             
-            # 指数退避
-            self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
+            if not self._stopping:
+                self.logger.error(f"重连失败，已达到最大重连次数: {self.max_reconnect_attempts}")
+            return False
+        finally:
+            self.reconnecting = False
+    
+    @staticmethod
+    def _channel_key(channel_type: str, identifier: str) -> str:
+        """服务器推送消息中的频道字符串（如order_book:42）"""
+        return f"{channel_type}:{identifier}"
+    
+    async def _send_subscribe(self, channel_type: str, identifier: str, top_n: int = 0):
+        """
+        功能：发送订阅请求
+        入参：channel_type - 频道类型；identifier - 标识符；top_n - 订单簿深度（0表示全部）
+        返回值：无
+        核心规则：订阅消息只在首次订阅时编码，发送失败时抛出异常由调用方处理
+        """
+        cache_key = (channel_type, identifier, top_n)
+        payload = self._sub_payload_cache.get(cache_key)
+        if payload is None:
+            subscribe_msg = {
+                'type': 'subscribe',
+                'channel': f"{channel_type}/{identifier}"
+            }
+            if channel_type == 'order_book' and top_n > 0:
+                subscribe_msg['depth'] = top_n
+            payload = self._sub_payload_cache[cache_key] = json_dumps(subscribe_msg)
         
-        self.logger.error(f"重连失败，已达到最大重连次数: {self.max_reconnect_attempts}")
-        self.reconnecting = False
+        await self.websocket.send(payload, text=True)
+        self.logger.info(f"发送订阅请求: {channel_type}/{identifier}")
     
-    async def subscribe(self, channel_type: str, identifier: str, callback: Callable):
+    async def subscribe(self, channel_type: str, identifier: str, callback: Callable, top_n: int = 0):
         """
         功能：订阅WebSocket频道
-        入参：channel_type - 频道类型；identifier - 标识符；callback - 回调函数
+        入参：channel_type - 频道类型；identifier - 标识符；callback - 回调函数；
+              top_n - 订单簿回调只需要的前N档（0表示全部，仅order_book频道有效）
         返回值：bool - 订阅是否成功
-        核心规则：1. 验证频道类型；2. 发送订阅消息；3. 注册回调函数
+        核心规则：1. 验证频道类型；2. 发送订阅消息；3. 按完整频道字符串注册回调函数；4. top_n随订阅请求发送depth
         """
-        if channel_type not in self.subscriptions:
+        if channel_type not in SUPPORTED_CHANNEL_TYPES:
             raise WebSocketClientError(f"不支持的频道类型: {channel_type}")
         
         if not self.connected:
             self.logger.error("WebSocket未连接，无法订阅")
             return False
         
-        # 构建频道字符串
-        channel = f"{channel_type}/{identifier}"
-        
-        # 发送订阅消息
-        subscribe_msg = {
-            'type': 'subscribe',
-            'channel': channel
-        }
-        
         try:
-            await self.websocket.send(json.dumps(subscribe_msg))
-            self.logger.info(f"发送订阅请求: {channel}")
-            
-            # 注册回调函数
-            if identifier not in self.subscriptions[channel_type]:
-                self.subscriptions[channel_type][identifier] = []
-            
-            self.subscriptions[channel_type][identifier].append(callback)
-            
-            return True
-            
+            await self._send_subscribe(channel_type, identifier, top_n)
         except Exception as e:
-            self.logger.error(f"订阅失败: {channel}, 错误: {e}")
+            self.logger.error(f"订阅失败: {channel_type}/{identifier}, 错误: {e}")
             return False
+        
+        if channel_type == 'order_book' and top_n > 0:
+            self.order_book_top_n[identifier] = top_n
+        
+        # 注册回调函数
+        key = self._channel_key(channel_type, identifier)
+        self._channels[key] = (channel_type, identifier)
+        existing = self.subscriptions.get(key)
+        if existing is None:
+            self.subscriptions[key] = callback
+        elif type(existing) is tuple:
+            self.subscriptions[key] = existing + (callback,)
+        else:
+            self.subscriptions[key] = (existing, callback)
+        
+        return True
     
     async def unsubscribe(self, channel_type: str, identifier: str):
         """
@@ -266,7 +594,7 @@ class LighterWebSocketClient:
         返回值：bool - 取消订阅是否成功
         核心规则：1. 验证频道类型；2. 发送取消订阅消息；3. 移除回调函数
         """
-        if channel_type not in self.subscriptions:
+        if channel_type not in SUPPORTED_CHANNEL_TYPES:
             raise WebSocketClientError(f"不支持的频道类型: {channel_type}")
         
         if not self.connected:
@@ -274,7 +602,8 @@ class LighterWebSocketClient:
             return False
         
         # 检查是否已订阅
-        if identifier not in self.subscriptions[channel_type]:
+        key = self._channel_key(channel_type, identifier)
+        if key not in self.subscriptions:
             self.logger.warning(f"未订阅: {channel_type}/{identifier}")
             return False
         
@@ -288,11 +617,15 @@ class LighterWebSocketClient:
         }
         
         try:
-            await self.websocket.send(json.dumps(unsubscribe_msg))
+            await self.websocket.send(json_dumps(unsubscribe_msg), text=True)
             self.logger.info(f"发送取消订阅请求: {channel}")
             
             # 移除回调函数
-            del self.subscriptions[channel_type][identifier]
+            del self.subscriptions[key]
+            self._channels.pop(key, None)
+            if channel_type == 'order_book':
+                self.order_books.pop(identifier, None)
+                self.order_book_top_n.pop(identifier, None)
             
             return True
             
@@ -300,15 +633,48 @@ class LighterWebSocketClient:
             self.logger.error(f"取消订阅失败: {channel}, 错误: {e}")
             return False
     
+    @contextlib.contextmanager
+    def _corked(self):
+        """
+        功能：批量发送期间暂缓TCP发送，让内核把多个小帧合并成较少的TCP段
+        入参：无
+        返回值：上下文管理器
+        核心规则：1. 仅Linux支持TCP_CORK，取不到套接字或设置失败时按原方式逐帧发送；2. 退出时取消CORK立即发出剩余数据
+        """
+        transport = getattr(self.websocket, 'transport', None)
+        sock = transport.get_extra_info('socket') if transport is not None and _TCP_CORK is not None else None
+        try:
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, 1)
+        except OSError:
+            sock = None
+        
+        try:
+            yield
+        finally:
+            if sock is not None:
+                try:
+                    sock.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, 0)
+                except OSError:
+                    pass
+    
     async def _resubscribe_all(self):
-        """重新订阅所有频道"""
+        """重新订阅所有频道（只重发订阅请求，已注册的回调保持不变；各订阅帧在CORK期间合并发送）"""
         self.logger.info("重新订阅所有频道")
         
-        for channel_type, identifiers in self.subscriptions.items():
-            for identifier, callbacks in identifiers.items():
-                if callbacks:  # 如果有回调函数，重新订阅
-                    # 只使用第一个回调函数重新订阅
-                    await self.subscribe(channel_type, identifier, callbacks[0])
+        pending = []
+        for key, callbacks in self.subscriptions.items():
+            if callbacks:
+                channel_type, identifier = self._channels[key]
+                top_n = self.order_book_top_n.get(identifier, 0) if channel_type == 'order_book' else 0
+                pending.append((channel_type, identifier, top_n))
+        
+        with self._corked():
+            for channel_type, identifier, top_n in pending:
+                try:
+                    await self._send_subscribe(channel_type, identifier, top_n)
+                except Exception as e:
+                    self.logger.error(f"订阅失败: {channel_type}/{identifier}, 错误: {e}")
     
     # ========== 消息处理器 ==========
     
@@ -319,8 +685,7 @@ class LighterWebSocketClient:
     async def _handle_ping(self, data: Dict[str, Any]):
         """处理ping消息，回复pong"""
         try:
-            pong_msg = {'type': 'pong'}
-            await self.websocket.send(json.dumps(pong_msg))
+            await self.websocket.send(_PONG_PAYLOAD, text=True)
             self.logger.debug("回复pong消息")
         except Exception as e:
             self.logger.error(f"回复pong失败: {e}")
@@ -329,129 +694,107 @@ class LighterWebSocketClient:
         """处理pong消息"""
         self.logger.debug("收到pong消息")
     
-    async def _handle_subscribed_order_book(self, data: Dict[str, Any]):
-        """处理订单簿订阅确认"""
-        channel = data.get('channel', '')
-        if ':' in channel:
-            market_id = channel.split(':')[1]
-            self.logger.info(f"订单簿订阅成功: market_id={market_id}")
-            
-            # 触发回调函数
-            callbacks = self.subscriptions['order_book'].get(market_id, [])
-            for callback in callbacks:
-                try:
-                    await callback('subscribed', data)
-                except Exception as e:
-                    self.logger.error(f"订单簿订阅回调执行失败: {e}")
-    
-    async def _handle_update_order_book(self, data: Dict[str, Any]):
-        """处理订单簿更新"""
-        channel = data.get('channel', '')
-        if ':' in channel:
-            market_id = channel.split(':')[1]
-            
-            # 触发回调函数
-            callbacks = self.subscriptions['order_book'].get(market_id, [])
-            for callback in callbacks:
-                try:
-                    await callback('update', data)
-                except Exception as e:
-                    self.logger.error(f"订单簿更新回调执行失败: {e}")
-    
-    async def _handle_subscribed_trade(self, data: Dict[str, Any]):
-        """处理交易订阅确认"""
-        channel = data.get('channel', '')
-        if ':' in channel:
-            market_id = channel.split(':')[1]
-            self.logger.info(f"交易订阅成功: market_id={market_id}")
-            
-            # 触发回调函数
-            callbacks = self.subscriptions['trade'].get(market_id, [])
-            for callback in callbacks:
-                try:
-                    await callback('subscribed', data)
-                except Exception as e:
-                    self.logger.error(f"交易订阅回调执行失败: {e}")
+    @staticmethod
+    def _get_book_payload(data: Dict[str, Any]) -> Dict[str, Any]:
+        """提取订单簿档位数据（Lighter推送字段为order_book，兼容data字段）"""
+        return data.get('order_book') or data.get('data') or {}
     
-    async def _handle_update_trade(self, data: Dict[str, Any]):
-        """处理交易更新"""
-        channel = data.get('channel', '')
-        if ':' in channel:
-            market_id = channel.split(':')[1]
-            
-            # 触发回调函数
-            callbacks = self.subscriptions['trade'].get(market_id, [])
-            for callback in callbacks:
-                try:
-                    await callback('update', data)
-                except Exception as e:
-                    self.logger.error(f"交易更新回调执行失败: {e}")
-    
-    async def _handle_subscribed_account(self, data: Dict[str, Any]):
-        """处理账户订阅确认"""
-        channel = data.get('channel', '')
-        if ':' in channel:
-            account_id = channel.split(':')[1]
-            self.logger.info(f"账户订阅成功: account_id={account_id}")
-            
-            # 触发回调函数
-            callbacks = self.subscriptions['account_all'].get(account_id, [])
-            for callback in callbacks:
-                try:
-                    await callback('subscribed', data)
-                except Exception as e:
-                    self.logger.error(f"账户订阅回调执行失败: {e}")
+    def _clip_book_payload(self, market_id: str, payload: Dict[str, Any]):
+        """
+        功能：按订阅的top_n裁剪原始档位列表
+        入参：market_id - 市场ID；payload - 订单簿档位数据
+        返回值：无
+        核心规则：在完整增量合并到本地订单簿之后、回调执行之前裁剪，多余档位在回调前即可被回收
+        """
+        top_n = self.order_book_top_n.get(market_id)
+        if not top_n:
+            return
+        for side in ('asks', 'bids'):
+            levels = payload.get(side)
+            if levels and len(levels) > top_n:
+                payload[side] = levels[:top_n]
     
-    async def _handle_update_account(self, data: Dict[str, Any]):
-        """处理账户更新"""
-        channel = data.get('channel', '')
-        if ':' in channel:
-            account_id = channel.split(':')[1]
-            
-            # 触发回调函数
-            callbacks = self.subscriptions['account_all'].get(account_id, [])
-            for callback in callbacks:
-                try:
-                    await callback('update', data)
-                except Exception as e:
-                    self.logger.error(f"账户更新回调执行失败: {e}")
-    
-    async def _handle_subscribed_ticker(self, data: Dict[str, Any]):
-        """处理ticker订阅确认"""
-        channel = data.get('channel', '')
-        if ':' in channel:
-            symbol = channel.split(':')[1]
-            self.logger.info(f"Ticker订阅成功: symbol={symbol}")
-            
-            # 触发回调函数
-            callbacks = self.subscriptions['ticker'].get(symbol, [])
-            for callback in callbacks:
-                try:
-                    await callback('subscribed', data)
-                except Exception as e:
-                    self.logger.error(f"Ticker订阅回调执行失败: {e}")
+    def _update_order_book(self, market_id: str, event: str, data: Dict[str, Any]):
+        """
+        功能：将订单簿推送合并到本地订单簿
+        入参：market_id - 市场ID；event - 事件类型（subscribed/update）；data - 消息数据
+        返回值：无
+        核心规则：1. 订阅确认用快照重建，更新为增量合并；2. 合并后裁剪档位；3. 回调通过data['book']读取
+        """
+        payload = self._get_book_payload(data)
+        book = self.order_books.get(market_id)
+        if book is None:
+            book = self.order_books[market_id] = create_order_book(market_id, self.ob_max_depth)
+        if event == 'subscribed':
+            book.reset(payload.get('asks', []), payload.get('bids', []))
+        else:
+            book.apply(payload.get('asks', []), payload.get('bids', []))
+        self._clip_book_payload(market_id, payload)
+        data['book'] = book
     
-    async def _handle_update_ticker(self, data: Dict[str, Any]):
-        """处理ticker更新"""
-        channel = data.get('channel', '')
-        if ':' in channel:
-            symbol = channel.split(':')[1]
-            
-            # 触发回调函数
-            callbacks = self.subscriptions['ticker'].get(symbol, [])
-            for callback in callbacks:
-                try:
-                    await callback('update', data)
-                except Exception as e:
-                    self.logger.error(f"Ticker更新回调执行失败: {e}")
+    async def _dispatch(self, channel_type: str, event: str, data: Dict[str, Any]):
+        """
+        功能：处理频道订阅确认和更新消息
+        入参：channel_type - 频道类型；event - 事件类型（subscribed/update）；data - 消息数据
+        返回值：无
+        核心规则：1. 按完整channel（如order_book:1）直接查找订阅，未订阅的频道忽略；2. 订单簿消息先更新本地订单簿；3. 触发回调函数（多个订阅者时并发执行）
+        """
+        identifier, callbacks = route_channel(data, self.subscriptions, self._channels)
+        if callbacks is None:
+            return
+        
+        label, id_name = _CHANNEL_LABELS[channel_type]
+        if event == 'subscribed':
+            self.logger.info(f"{label}订阅成功: {id_name}={identifier}")
+        
+        if channel_type == 'order_book':
+            self._update_order_book(identifier, event, data)
+        
+        # 触发回调函数：单个订阅者直接await，多个订阅者并发执行，慢回调不再拖住其他订阅者
+        if type(callbacks) is not tuple:
+            try:
+                await callbacks(event, data)
+            except Exception as e:
+                self.logger.error(f"{label}{'订阅' if event == 'subscribed' else '更新'}回调执行失败: {e}")
+            return
+        
+        results = await asyncio.gather(*(callback(event, data) for callback in callbacks), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                self.logger.error(f"{label}{'订阅' if event == 'subscribed' else '更新'}回调执行失败: {result}")
     
     def is_connected(self) -> bool:
         """检查是否已连接"""
         return self.connected
     
+    async def ping(self, timeout: float = 0.5) -> bool:
+        """
+        功能：连接存活探测，发送协议层ping帧并等待pong
+        入参：timeout - 等待pong的超时时间（秒）
+        返回值：超时前收到pong返回True，未连接、超时或连接已断开返回False
+        核心规则：connected标志只反映最近一次连接结果，可能已过期；ping往返才能确认连接可用
+        """
+        if not self.connected or not self.websocket:
+            return False
+        
+        try:
+            pong_waiter = await self.websocket.ping()
+            await asyncio.wait_for(pong_waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.logger.warning(f"WebSocket ping超时（{timeout}秒内未收到pong）")
+            return False
+        except Exception as e:
+            self.logger.warning(f"WebSocket ping失败: {e}")
+            return False
+    
+    def get_local_order_book(self, market_id: str) -> Optional[Union[CLocalOrderBook, LocalOrderBook]]:
+        """获取指定市场的本地订单簿（未订阅时返回None）"""
+        return self.order_books.get(market_id)
+    
     def get_subscription_count(self) -> Dict[str, int]:
         """获取各类型频道的订阅数量"""
-        return {
-            channel_type: len(identifiers)
-            for channel_type, identifiers in self.subscriptions.items()
-        }
+        counts = dict.fromkeys(SUPPORTED_CHANNEL_TYPES, 0)
+        for channel_type, _ in self._channels.values():
+            counts[channel_type] += 1
+        return counts
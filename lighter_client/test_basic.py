@@ -4,22 +4,107 @@ Lighter客户端基本功能测试
 """
 
 import asyncio
+import contextlib
+import contextvars
 import logging
 import sys
-import os
+from itertools import islice
+from operator import methodcaller
+from typing import TYPE_CHECKING
 
-# 添加当前目录到Python路径，以便导入src模块
-sys.path.insert(0, os.path.dirname(__file__))
+# 直接从src导入（以脚本运行时，脚本所在目录已是sys.path[0]，无需再插入路径）
+from src._loop import run
 
-# 直接从src导入
-from src.lighter_client import LighterClient
+if TYPE_CHECKING:
+    from src.lighter_client import LighterClient
 
 
-# 配置日志
+# 配置日志：使用原始时间戳（不经过strftime/localtime），不采集线程、进程信息和调用位置（findCaller）
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logging._srcfile = None
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(created).3f - %(name)s - %(levelname)s - %(message)s'
 )
+log = logging.getLogger(__name__)
+
+# 探测任务的上下文模板：每个任务使用它的独立副本（Context.copy为O(1)），
+# 任务之间的contextvars写入互不可见，也不会有两个运行中的任务同时进入同一个上下文
+PROBE_CONTEXT = contextvars.Context()
+
+# 并发探测的工作协程数量上限（探测项少于上限时按探测项数量创建）
+PROBE_WORKERS = 32
+
+# 关闭客户端的超时时间（秒）
+CLOSE_TIMEOUT = 2.0
+
+
+def flush_output():
+    """输出一个阶段的测试结果：stdout改为块缓冲后，只在耗时操作（导入、网络请求）前和退出前写出"""
+    sys.stdout.flush()
+
+
+def format_levels(levels, limit: int) -> str:
+    """将订单簿前limit档拼接为一个字符串（每侧一次print，而不是每档一次）"""
+    get = dict.get
+    return "\n".join(
+        f"    {i}. 价格={get(level, 'price')}, 数量={get(level, 'quantity')}"
+        for i, level in enumerate(levels[:limit], 1)
+    )
+
+
+async def capture(coro):
+    """执行协程，异常作为返回值（并发请求中单项失败不影响其他请求）"""
+    try:
+        return await coro
+    except Exception as e:
+        return e
+
+
+async def probe_worker(queue: asyncio.Queue, client: 'LighterClient', results: dict):
+    """探测工作协程：从队列取出(名称, 探测函数)执行，结果按名称写入results，取到None时退出"""
+    while (job := await queue.get()) is not None:
+        name, probe = job
+        results[name] = await capture(probe(client))
+
+
+async def run_probes(client: 'LighterClient', probes: dict, workers: int = PROBE_WORKERS) -> dict:
+    """
+    功能：用固定数量的工作协程并发执行探测请求
+    入参：client - 客户端实例；probes - 名称 -> 探测函数(client) -> 协程；workers - 工作协程数量上限
+    返回值：名称 -> 结果（失败时为异常对象）
+    核心规则：1. 探测数量再多也只创建workers个任务，队列排队，不一次性创建全部协程；
+              2. TaskGroup保证测试被取消或出错时未完成的请求一并取消并等待结束
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in probes.items():
+        queue.put_nowait(job)
+    
+    worker_count = min(workers, len(probes))
+    # 每个工作协程一个结束标记，排在全部探测之后
+    for _ in range(worker_count):
+        queue.put_nowait(None)
+    
+    results = {}
+    async with asyncio.TaskGroup() as tg:
+        for _ in range(worker_count):
+            tg.create_task(probe_worker(queue, client, results), context=PROBE_CONTEXT.copy())
+    return results
+
+
+async def close_client(client: 'LighterClient'):
+    """关闭客户端：shield保证测试被取消时关闭流程仍执行完，超时上限避免退出时无限等待"""
+    print("\n7. 关闭客户端...")
+    flush_output()
+    try:
+        await asyncio.shield(asyncio.wait_for(client.close(), timeout=CLOSE_TIMEOUT))
+        print("✅ 客户端已关闭")
+    except asyncio.TimeoutError:
+        print(f"⚠️  关闭客户端超时（{CLOSE_TIMEOUT}秒）")
+    except Exception as e:
+        print(f"⚠️  关闭客户端时出错: {e}")
 
 
 async def test_basic_functionality():
@@ -30,111 +115,118 @@ async def test_basic_functionality():
     
     # 创建客户端实例（使用测试环境文件）
     print("\n1. 创建客户端实例...")
+    # 导入客户端模块和加载配置耗时较长，先写出已有的输出
+    flush_output()
     try:
-        # 使用测试环境文件
-        from src.config import LighterConfig
-        config = LighterConfig(env_file=".env.test")
+        # 客户端模块依赖aiohttp、websockets、lighter SDK等重量级模块，到真正开始测试时才导入
+        from src.lighter_client import LighterClient
+        # 使用测试环境文件：get_config在进程内按路径缓存实例，跨进程命中配置缓存
+        # （设置LIGHTER_CONFIG_CACHE_DIR且.env.test未修改时跳过配置校验，见README）
+        from src.config import get_config
+        config = get_config(".env.test")
         client = LighterClient(config)
         print("✅ 客户端实例创建成功")
     except Exception as e:
         print(f"❌ 客户端实例创建失败: {e}")
         return False
     
-    try:
-        # 初始化客户端
-        print("\n2. 初始化客户端...")
-        initialized = await client.initialize()
+    # 正常结束和出错时都通过退出栈关闭客户端
+    async with contextlib.AsyncExitStack() as stack:
+        stack.push_async_callback(close_client, client)
         
-        if not initialized:
-            print("❌ 客户端初始化失败")
-            return False
-        
-        print("✅ 客户端初始化成功")
-        print(f"客户端状态:\n{client}")
-        
-        # 测试获取市场信息
-        print("\n3. 测试获取市场信息...")
         try:
-            market_info = await client.get_market_info()
+            # 初始化客户端
+            print("\n2. 初始化客户端...")
+            flush_output()
+            initialized = await client.initialize()
+            
+            if not initialized:
+                print("❌ 客户端初始化失败")
+                return False
+            
+            print("✅ 客户端初始化成功")
+            print(f"客户端状态:\n{client}")
+            
+            # 市场信息、账户余额、订单簿互不依赖，并发请求，总耗时取决于最慢的一个
+            flush_output()
+            results = await run_probes(client, {
+                'market_info': methodcaller('get_market_info'),
+                'balances': methodcaller('get_account_balance'),
+                'order_book': methodcaller('get_order_book', depth=3),
+            })
+            market_info, balances, order_book = results['market_info'], results['balances'], results['order_book']
+            
+            # 测试获取市场信息
+            print("\n3. 测试获取市场信息...")
+            if isinstance(market_info, Exception):
+                print(f"❌ 获取市场信息失败: {market_info}")
+                return False
             print(f"✅ 获取市场信息成功")
-            print(f"  交易对: {market_info.get('symbol')}")
-            print(f"  价格精度: {market_info.get('price_precision')}")
-            print(f"  数量精度: {market_info.get('quantity_precision')}")
-        except Exception as e:
-            print(f"❌ 获取市场信息失败: {e}")
-            return False
-        
-        # 测试获取账户余额（可能失败，如果没有配置正确的私钥）
-        print("\n4. 测试获取账户余额...")
-        try:
-            balances = await client.get_account_balance()
-            print(f"✅ 获取账户余额成功")
-            print(f"  资产数量: {len(balances)}")
-            if balances:
-                for symbol in list(balances.keys())[:3]:  # 只显示前3个
-                    balance = balances[symbol]
-                    print(f"  {symbol}: 可用={balance['free']}, 总计={balance['total']}")
-        except Exception as e:
-            print(f"⚠️  获取账户余额失败（可能是配置问题）: {e}")
-            # 这不一定是测试失败，可能是配置问题
-        
-        # 测试获取订单簿
-        print("\n5. 测试获取订单簿...")
-        try:
-            order_book = await client.get_order_book(depth=3)
+            print(f"  交易对: {market_info.symbol}")
+            print(f"  价格精度: {market_info.price_precision}")
+            print(f"  数量精度: {market_info.quantity_precision}")
+            
+            # 测试获取账户余额（可能失败，如果没有配置正确的私钥）
+            print("\n4. 测试获取账户余额...")
+            if isinstance(balances, Exception):
+                print(f"⚠️  获取账户余额失败（可能是配置问题）: {balances}")
+                # 这不一定是测试失败，可能是配置问题
+            else:
+                print(f"✅ 获取账户余额成功")
+                print(f"  资产数量: {len(balances)}")
+                if balances:
+                    for symbol, balance in islice(balances.items(), 3):  # 只显示前3个
+                        print(f"  {symbol}: 可用={balance['free']}, 总计={balance['total']}")
+            
+            # 测试获取订单簿
+            print("\n5. 测试获取订单簿...")
+            if isinstance(order_book, Exception):
+                print(f"❌ 获取订单簿失败: {order_book}")
+                return False
             print(f"✅ 获取订单簿成功")
             print(f"  交易对: {order_book.get('symbol')}")
             print(f"  卖单数量: {len(order_book.get('asks', []))}")
             print(f"  买单数量: {len(order_book.get('bids', []))}")
             
             if order_book.get('asks'):
-                print("  前2个卖单:")
-                for i, ask in enumerate(order_book['asks'][:2]):
-                    print(f"    {i+1}. 价格={ask.get('price')}, 数量={ask.get('quantity')}")
+                print(f"  前2个卖单:\n{format_levels(order_book['asks'], 2)}")
             
             if order_book.get('bids'):
-                print("  前2个买单:")
-                for i, bid in enumerate(order_book['bids'][:2]):
-                    print(f"    {i+1}. 价格={bid.get('price')}, 数量={bid.get('quantity')}")
-        except Exception as e:
-            print(f"❌ 获取订单簿失败: {e}")
-            return False
-        
-        # 测试WebSocket连接
-        print("\n6. 测试WebSocket连接...")
-        if client.ws_client:
-            if client.ws_client.is_connected():
-                print("✅ WebSocket已连接")
-                print(f"  订阅数量: {client.ws_client.get_subscription_count()}")
+                print(f"  前2个买单:\n{format_levels(order_book['bids'], 2)}")
+            
+            # 测试WebSocket连接
+            print("\n6. 测试WebSocket连接...")
+            ws = client.ws_client
+            if ws is not None:
+                flush_output()
+                # connected标志可能已过期，用有超时的ping往返确认连接可用
+                if await ws.ping(timeout=0.5):
+                    print("✅ WebSocket已连接")
+                    print(f"  订阅数量: {ws.get_subscription_count()}")
+                else:
+                    print("⚠️  WebSocket未连接")
             else:
-                print("⚠️  WebSocket未连接")
-        else:
-            print("⚠️  WebSocket客户端不可用")
-        
-        print("\n" + "=" * 60)
-        print("基本功能测试完成")
-        print("=" * 60)
-        
-        return True
-        
-    except Exception as e:
-        print(f"\n❌ 测试过程中发生错误: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
-        
-    finally:
-        # 关闭客户端
-        print("\n7. 关闭客户端...")
-        try:
-            await client.close()
-            print("✅ 客户端已关闭")
+                print("⚠️  WebSocket客户端不可用")
+            
+            print("\n" + "=" * 60)
+            print("基本功能测试完成")
+            print("=" * 60)
+            
+            return True
+            
         except Exception as e:
-            print(f"⚠️  关闭客户端时出错: {e}")
+            print(f"\n❌ 测试过程中发生错误: {e}")
+            flush_output()
+            log.exception("测试过程中发生错误")
+            return False
 
 
 async def main():
     """主函数"""
+    # Python 3.12+：任务创建时立即执行到第一次挂起，命中缓存直接完成的任务不再经过一轮事件循环调度
+    if hasattr(asyncio, 'eager_task_factory'):
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+    
     success = await test_basic_functionality()
     
     if success:
@@ -146,4 +238,12 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # 终端下stdout默认按行缓冲，每个print一次write系统调用；改为块缓冲，按阶段写出
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(line_buffering=False)
+    
+    # 限制异常回溯的层数：初始化失败时调用栈深入aiohttp，不必逐帧读取源码
+    sys.tracebacklimit = 20
+    
+    # 优先使用uvloop事件循环（未安装时回退到asyncio默认事件循环）
+    run(main())